@@ -0,0 +1,213 @@
+"""
+mix the soundtrack of a piece from the sounds of the notes in the data directory
+"""
+import os
+import wave
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+#directory of the midiNN.wav sounds of the notes and of silence.wav
+SOUND_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')
+#the sounds of the notes are not played longer than this, in seconds
+MAX_NOTE_SECONDS = 4
+#memory that the decoded sounds can use by default, in bytes
+SAMPLE_BANK_MAX_BYTES = 256 * 2**20
+
+class AudioError(Exception):
+    """Exception thrown when a .wav file cannot be read or written."""
+    pass
+
+def read_wav(filepath):
+    """return (samples, fps) of a 16 bits PCM .wav file
+
+    samples is a float32 array of shape (number of samples, number of channels) with values in [-1, 1]
+    """
+    pcm, fps = read_wav_pcm(filepath)
+    return (pcm.astype(np.float32) / 32768, fps)
+
+def write_wav(filepath, samples, fps):
+    """register samples (values in [-1, 1], shape (number of samples, number of channels)) in a 16 bits .wav file"""
+    samples = np.asarray(samples)
+    if samples.ndim == 1:
+        samples = samples[:, np.newaxis]
+    data = (np.clip(samples, -1, 1) * 32767).astype('<i2')
+    with wave.open(filepath, 'wb') as wav_file:
+        wav_file.setnchannels(samples.shape[1])
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(fps)
+        wav_file.writeframes(data.tobytes())
+
+def read_wav_pcm(filepath, mmap=False):
+    """return (pcm, fps) of a 16 bits PCM .wav file
+
+    pcm is the int16 array of shape (number of samples, number of channels) of the file,
+    if mmap is True it is memory-mapped from the file instead of being read.
+    """
+    try:
+        with wave.open(filepath, 'rb') as wav_file:
+            if wav_file.getsampwidth() != 2:
+                raise AudioError('Only 16 bits .wav files can be read: ' + filepath)
+            nb_channels = wav_file.getnchannels()
+            fps = wav_file.getframerate()
+            nb_samples = wav_file.getnframes()
+            if not mmap:
+                data = wav_file.readframes(nb_samples)
+    except (wave.Error, EOFError) as error:
+        raise AudioError(error)
+    if not mmap:
+        return (np.frombuffer(data, dtype='<i2').reshape(-1, nb_channels), fps)
+    pcm = np.memmap(filepath, dtype='<i2', mode='r', offset=_get_wav_data_offset(filepath),
+                    shape=(nb_samples, nb_channels))
+    return (pcm, fps)
+
+def _get_wav_data_offset(filepath):
+    """return the position in bytes of the samples in a .wav file (the content of its 'data' chunk)"""
+    with open(filepath, 'rb') as wav_file:
+        wav_file.seek(12) # 'RIFF', size, 'WAVE'
+        while True:
+            header = wav_file.read(8)
+            if len(header) < 8:
+                raise AudioError('No data chunk in ' + filepath)
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'data':
+                return wav_file.tell()
+            # the chunks are aligned on 2 bytes
+            wav_file.seek(chunk_size + chunk_size % 2, 1)
+
+class SampleBank(object):
+    """Cache of the sounds of the data directory, shared by all the soundtracks of the process.
+
+    Each file is decoded at most once while it stays in the bank, the sounds that
+    were used the least recently are removed when the bank uses more than max_bytes.
+    With mmap=True the samples are memory-mapped from the files, they are then
+    loaded by the system when they are played and do not count in max_bytes.
+    """
+
+    def __init__(self, sound_path=SOUND_PATH, max_bytes=SAMPLE_BANK_MAX_BYTES, mmap=False):
+        self.sound_path = sound_path
+        self.max_bytes = max_bytes
+        self.mmap = mmap
+        self.nbytes = 0
+        self._sounds = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, filename):
+        """return (pcm, fps) of the sound file of the bank, see read_wav_pcm"""
+        with self._lock:
+            if filename in self._sounds:
+                self._sounds.move_to_end(filename)
+                return self._sounds[filename]
+        sound = read_wav_pcm(os.path.join(self.sound_path, filename), mmap=self.mmap)
+        with self._lock:
+            if filename not in self._sounds:
+                self._sounds[filename] = sound
+                self.nbytes += self._get_nbytes(sound)
+                self._evict()
+        return sound
+
+    def clear(self):
+        """remove all the sounds from the bank"""
+        with self._lock:
+            self._sounds.clear()
+            self.nbytes = 0
+
+    def _evict(self):
+        """remove the least recently used sounds until the bank uses less than max_bytes"""
+        # keep at least the last sound, it is being played
+        while self.nbytes > self.max_bytes and len(self._sounds) > 1:
+            filename, sound = self._sounds.popitem(last=False)
+            self.nbytes -= self._get_nbytes(sound)
+
+    @staticmethod
+    def _get_nbytes(sound):
+        """return the memory used by a sound, 0 if it is memory-mapped"""
+        return 0 if isinstance(sound[0], np.memmap) else sound[0].nbytes
+
+#the bank used by default, it can be replaced e.g. by SampleBank(mmap=True)
+sample_bank = SampleBank()
+
+def get_note_sound(pitch, bank=None):
+    """return (pcm, fps) of the sound of the midi pitch from the bank (by default sample_bank)"""
+    bank = sample_bank if bank is None else bank
+    return bank.get('midi' + str(int(pitch)) + '.wav')
+
+def mix_soundtrack(pitches, onsets, durations, filepath=None, bank=None):
+    """return (samples, fps) of the soundtrack where each note is played at its onset
+
+    The sound of each pitch is taken once from the bank, cut to the duration of the note and
+    added in one buffer, the soundtrack lasts at least as long as silence.wav.
+    Keyword arguments:
+    pitches -- the midi pitch of each note
+    onsets -- the onset of each note in seconds
+    durations -- the duration of each note in seconds
+    filepath -- if given, the soundtrack is also registered in this .wav file
+    bank -- the SampleBank where the sounds are read, by default sample_bank
+    """
+    pitches, starts, lengths, sounds, nb_samples, nb_channels, fps = _get_notes_samples(pitches, onsets, durations, bank)
+
+    samples = np.zeros((nb_samples, nb_channels), dtype=np.float32)
+    for pitch, start, length in zip(pitches, starts, lengths):
+        sound = sounds[pitch][:length].astype(np.float32) / 32768
+        samples[start:start + sound.shape[0]] += sound
+
+    if filepath is not None:
+        write_wav(filepath, samples, fps)
+    return (samples, fps)
+
+def write_soundtrack(pitches, onsets, durations, filepath, bank=None, block_seconds=10):
+    """register the soundtrack of mix_soundtrack in a .wav file, return its number of samples
+
+    The soundtrack is mixed and written by blocks of block_seconds, so the memory used
+    does not depend on the length of the piece.
+    """
+    pitches, starts, lengths, sounds, nb_samples, nb_channels, fps = _get_notes_samples(pitches, onsets, durations, bank)
+    #the notes are sorted by start so the notes of a block are found with searchsorted
+    order = np.argsort(starts, kind='stable')
+    pitches, starts, lengths = pitches[order], starts[order], lengths[order]
+    #the notes that started before a block can last until then
+    ends = np.maximum.accumulate(starts + lengths) if starts.shape[0] > 0 else starts
+    block_size = int(block_seconds * fps)
+
+    with wave.open(filepath, 'wb') as wav_file:
+        wav_file.setnchannels(nb_channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(fps)
+        for block_start in range(0, nb_samples, block_size):
+            block_end = min(block_start + block_size, nb_samples)
+            samples = np.zeros((block_end - block_start, nb_channels), dtype=np.float32)
+            first = np.searchsorted(ends, block_start, side='right')
+            last = np.searchsorted(starts, block_end, side='left')
+            for pitch, start, length in zip(pitches[first:last], starts[first:last], lengths[first:last]):
+                #the part of the note that is in the block
+                begin = max(start, block_start)
+                end = min(start + length, block_end, start + sounds[pitch].shape[0])
+                if end > begin:
+                    sound = sounds[pitch][begin - start:end - start].astype(np.float32) / 32768
+                    samples[begin - block_start:end - block_start] += sound
+            wav_file.writeframes((np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes())
+    return nb_samples
+
+def _get_notes_samples(pitches, onsets, durations, bank):
+    """return the notes in samples (pitches, starts, lengths), the sound of each pitch, the number of samples,
+    the number of channels and the fps of the soundtrack, see mix_soundtrack"""
+    bank = sample_bank if bank is None else bank
+    pitches = np.asarray(pitches).astype(int)
+    onsets = np.asarray(onsets, dtype=float)
+    durations = np.minimum(np.asarray(durations, dtype=float), MAX_NOTE_SECONDS)
+
+    silence, fps = bank.get('silence.wav')
+    sounds = {}
+    for pitch in np.unique(pitches):
+        sound, sound_fps = get_note_sound(pitch, bank)
+        if sound_fps != fps or sound.shape[1] != silence.shape[1]:
+            raise AudioError('The sound of the pitch %d does not have the format of silence.wav' % pitch)
+        sounds[pitch] = sound
+
+    #the position of the notes in samples
+    starts = np.round(onsets * fps).astype(int)
+    lengths = np.round(durations * fps).astype(int)
+    nb_samples = max(silence.shape[0], (starts + lengths).max() if starts.shape[0] > 0 else 0)
+    return (pitches, starts, lengths, sounds, nb_samples, silence.shape[1], fps)
@@ -0,0 +1,52 @@
+"""
+Benchmark of the import time of the modules, checks that the parser does not load the plotting and audio libraries
+"""
+import os
+import sys
+import subprocess
+
+#time that importing pitchplots.parser can take, in seconds
+PARSER_IMPORT_BUDGET = 1.0
+#the modules that are only imported when a figure is shown or a soundtrack is rendered
+LAZY_MODULES = ['matplotlib.pyplot', 'moviepy']
+
+def get_import_times(module):
+    """import the module in a new interpreter with python -X importtime, return a dict module: seconds
+
+    The time of each module includes the time of the modules it imports.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                             stderr=subprocess.PIPE, universal_newlines=True, env=env, check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        #import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+def bench_import(modules=('pitchplots.parser', 'pitchplots.reader', 'pitchplots.static', 'pitchplots.export'),
+                 repeat=3):
+    """return a list of (module, seconds, lazy modules that were imported) for each module, the best time is kept"""
+    results = []
+    for module in modules:
+        seconds = float('inf')
+        for i in range(repeat):
+            times = get_import_times(module)
+            seconds = min(seconds, times[module])
+        imported = [name for name in LAZY_MODULES if name in times]
+        results.append((module, seconds, imported))
+    return results
+
+if __name__ == '__main__':
+    results = bench_import()
+    for module, seconds, imported in results:
+        print('%-20s %8.3f s   %s' % (module, seconds, ', '.join(imported) or 'no lazy module imported'))
+
+    module, seconds, imported = results[0]
+    assert not imported, '%s imports %s' % (module, ', '.join(imported))
+    assert seconds < PARSER_IMPORT_BUDGET, '%s takes %.3f s to import, more than %.1f s' % (module, seconds, PARSER_IMPORT_BUDGET)
+    for module, seconds, imported in results[1:]:
+        assert not imported, '%s imports %s' % (module, ', '.join(imported))
@@ -0,0 +1,55 @@
+"""
+Benchmark of xml_to_csv, shows how the parsing time grows with the number of notes
+"""
+import os
+import copy
+import time
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+
+from pitchplots.parser import xml_to_csv
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+                            'data', 'data_example.mxl')
+
+def repeated_score(repeat, filepath=EXAMPLE_PATH):
+    """return the example score as an xml string with the measures of every part repeated
+
+    Keyword arguments:
+    repeat -- how many times the measures of each part are written
+    filepath -- the .mxl file to repeat (default the example file)
+    """
+    with zipfile.ZipFile(filepath) as mxlzip:
+        name = [n for n in mxlzip.namelist() if not n.startswith('META-INF')][0]
+        score = ET.fromstring(mxlzip.read(name))
+    for part in score.findall('part'):
+        measures = part.findall('measure')
+        for i in range(repeat - 1):
+            for measure in measures:
+                part.append(copy.deepcopy(measure))
+    return ET.tostring(score, encoding='unicode')
+
+def bench_xml_to_csv(repeats=(1, 2, 4, 8, 16)):
+    """time xml_to_csv on scores of growing size, return a list of (notes, seconds)"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for repeat in repeats:
+            path = os.path.join(tmp_dir, 'score_%d.xml' % repeat)
+            with open(path, 'w') as f:
+                f.write(repeated_score(repeat))
+            start = time.perf_counter()
+            df = xml_to_csv(path, save_csv=False)
+            results.append((df.shape[0], time.perf_counter() - start))
+    return results
+
+if __name__ == '__main__':
+    previous = None
+    for notes, seconds in bench_xml_to_csv():
+        per_note = seconds / notes * 1e6
+        line = '%8d notes %8.3f s %8.1f us/note' % (notes, seconds, per_note)
+        if previous is not None:
+            #a linear parser keeps the time per note roughly constant
+            line += '  (x%.2f per note)' % (per_note / previous)
+        previous = per_note
+        print(line)
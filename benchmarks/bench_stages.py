@@ -0,0 +1,145 @@
+"""
+Benchmark of each stage from the score to the image (parse, onset correction, aggregation, layout and render)
+
+The time and the peak memory of every stage are measured separately on small, medium and huge scores
+made from the example file, and can be compared to the results of a previous run:
+
+    python bench_stages.py --save baseline.json
+    python bench_stages.py --compare baseline.json
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+
+import pitchplots.parser as ppp
+from pitchplots.reader import get_df_short, get_df_long
+from pitchplots.static import line, circle, tonnetz
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+from bench_parser import repeated_score
+
+#how many times the measures of the example file are repeated in each score
+SIZES = {'small': 1, 'medium': 16, 'huge': 128}
+#a stage is a regression if it takes this much more time or memory than in the baseline
+TOLERANCE = 0.25
+#the charts of the layout and render stages
+CHARTS = {'line': line, 'circle': circle, 'tonnetz': tonnetz}
+
+def get_uncorrected_df(filepath):
+    """return the DataFrame of a score before data_onset_duration_corrector is applied"""
+    uncorrected = []
+    corrector = ppp.data_onset_duration_corrector
+    def keep_uncorrected(data, duration):
+        uncorrected.append(data.copy())
+        return corrector(data, duration)
+    ppp.data_onset_duration_corrector = keep_uncorrected
+    try:
+        ppp.xml_to_csv(filepath, save_csv=False, cache=False)
+    finally:
+        ppp.data_onset_duration_corrector = corrector
+    return uncorrected[0]
+
+def get_stages(filepath):
+    """return the list of (stage, setup, run) of a score, run(setup()) is the measured call"""
+    df = ppp.xml_to_csv(filepath, save_csv=False, cache=False)
+    uncorrected = get_uncorrected_df(filepath)
+    stages = [
+        ('parse', lambda: filepath, lambda path: ppp.xml_to_csv(path, save_csv=False, cache=False)),
+        ('correct', lambda: uncorrected.copy(), lambda data: ppp.data_onset_duration_corrector(data, 'whole_note')),
+        ('aggregate_short', lambda: df, get_df_short),
+        ('aggregate_long', lambda: df, get_df_long)]
+    for name, chart in CHARTS.items():
+        stages.append(('layout_' + name, lambda: df, lambda piece, chart=chart: chart(piece)))
+        stages.append(('render_' + name, lambda chart=chart: chart(df),
+                       lambda fig: fig.savefig(io.BytesIO(), format='png')))
+    return stages
+
+def measure(setup, run, repeat):
+    """return (seconds, peak_bytes) of run(setup()), the best time of repeat runs and the peak memory of one more"""
+    seconds = float('inf')
+    for i in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        run(arg)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    #tracemalloc slows the run down so the memory is measured apart
+    arg = setup()
+    tracemalloc.start()
+    try:
+        run(arg)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return (seconds, peak_bytes)
+
+def bench_stages(sizes=('small', 'medium', 'huge'), stages=None, repeat=3):
+    """measure the stages on the scores of the given sizes, return a dict 'size/stage': {'seconds', 'peak_bytes'}
+
+    Keyword arguments:
+    sizes -- the sizes of the scores, keys of SIZES
+    stages -- the names of the stages to measure, by default all of them
+    repeat -- the number of runs of each stage, the best time is kept
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            path = os.path.join(tmp_dir, size + '.xml')
+            with open(path, 'w') as f:
+                f.write(repeated_score(SIZES[size]))
+            for stage, setup, run in get_stages(path):
+                if stages is not None and stage not in stages:
+                    continue
+                seconds, peak_bytes = measure(setup, run, repeat)
+                results['%s/%s' % (size, stage)] = {'seconds': seconds, 'peak_bytes': peak_bytes}
+    return results
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """return the list of (key, measure, value, baseline value) of the results that are worse than the baseline"""
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for name in ['seconds', 'peak_bytes']:
+            if result[name] > baseline[key][name] * (1 + tolerance):
+                regressions.append((key, name, result[name], baseline[key][name]))
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES))
+    parser.add_argument('--stages', nargs='+', help='the stages to measure, by default all of them')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', help='register the results in this .json file')
+    parser.add_argument('--compare', help='compare the results to the ones of this .json file')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    results = bench_stages(args.sizes, args.stages, args.repeat)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    for key, result in results.items():
+        line_text = '%-28s %9.4f s %9.1f MB' % (key, result['seconds'], result['peak_bytes'] / 2**20)
+        if key in baseline:
+            line_text += '   (x%.2f time, x%.2f memory)' % (result['seconds'] / baseline[key]['seconds'],
+                                                         result['peak_bytes'] / max(baseline[key]['peak_bytes'], 1))
+        print(line_text)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        regressions = compare(results, baseline, args.tolerance)
+        for key, name, value, base_value in regressions:
+            print('REGRESSION %s %s: %.4g against %.4g' % (key, name, value, base_value))
+        sys.exit(1 if regressions else 0)
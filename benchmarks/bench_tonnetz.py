@@ -0,0 +1,53 @@
+"""
+Benchmark of static.tonnetz without duplicates, shows how the time grows with the radius of the grid
+"""
+import os
+import io
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import pandas as pd
+
+from pitchplots.static import tonnetz
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+                            'data', 'data_example.csv')
+
+def bench_tonnetz(radii=(5, 10, 15, 20, 25, 30), pitch_class_display=False, draw=False, repeat=3):
+    """time tonnetz with duplicate=False on grids of growing radius, return a list of (radius, hexagons, seconds)
+
+    Keyword arguments:
+    radii -- the radius of the grids
+    pitch_class_display -- if True the grids are in pitch classes, in tpc otherwise
+    draw -- if True the time includes drawing the figure in a png
+    repeat -- the number of plots of each grid, the best time is kept
+    """
+    piece = pd.read_csv(EXAMPLE_PATH)
+    pitch_type = 'pc' if pitch_class_display else 'tpc'
+    results = []
+    for radius in radii:
+        seconds = float('inf')
+        for i in range(repeat):
+            start = time.perf_counter()
+            fig = tonnetz(piece, pitch_type=pitch_type, pitch_class_display=pitch_class_display,
+                          duplicate=False, radius=radius, colorbar=False)
+            if draw:
+                fig.savefig(io.BytesIO(), format='png')
+            seconds = min(seconds, time.perf_counter() - start)
+        hexagons = 3 * radius * (radius + 1) + 1
+        results.append((radius, hexagons, seconds))
+    return results
+
+if __name__ == '__main__':
+    for pitch_class_display in [False, True]:
+        print('pitch_class_display=%s' % pitch_class_display)
+        previous = None
+        for radius, hexagons, seconds in bench_tonnetz(pitch_class_display=pitch_class_display):
+            per_hex = seconds / hexagons * 1e6
+            line = '%4d radius %6d hexagons %8.3f s %8.1f us/hexagon' % (radius, hexagons, seconds, per_hex)
+            if previous is not None:
+                #with a linear duplicate check the time per hexagon does not grow, the cost of the figure is shared
+                line += '  (x%.2f per hexagon)' % (per_hex / previous)
+            previous = per_hex
+            print(line)
@@ -0,0 +1,41 @@
+"""
+Benchmark of render_animation, shows the frames per second and that the memory does not grow with the length of the video
+"""
+import os
+import sys
+import subprocess
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+                            'data', 'data_example.mxl')
+
+#each run is in a new process so its peak of memory is its own
+RUN = '''
+import sys, ast, resource, tempfile, os
+from pitchplots.video import render_animation
+with tempfile.TemporaryDirectory() as tmp_dir:
+    nb_frames, fps = render_animation(sys.argv[1], os.path.join(tmp_dir, 'video.mp4'), chart=sys.argv[2],
+                                      measures=ast.literal_eval(sys.argv[3]), sampling_frequency=int(sys.argv[4]))
+print(nb_frames, fps, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+def bench_video(chart='tonnetz', measures=([1, 4], [1, 16], None), sampling_frequency=5):
+    """render videos of growing length, return a list of (frames, frames per second, peak memory in MB)
+
+    Keyword arguments:
+    chart -- the type of chart, 'tonnetz', 'circle' or 'line'
+    measures -- the measures of the example file rendered in each video, None for the whole piece
+    sampling_frequency -- the frames by second of the videos
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    results = []
+    for measure in measures:
+        process = subprocess.run([sys.executable, '-c', RUN, EXAMPLE_PATH, chart, repr(measure), str(sampling_frequency)],
+                                 stdout=subprocess.PIPE, universal_newlines=True, env=env, check=True)
+        nb_frames, fps, max_rss = process.stdout.split()
+        # ru_maxrss is in kilobytes on linux
+        results.append((int(nb_frames), float(fps), int(max_rss) / 1024))
+    return results
+
+if __name__ == '__main__':
+    for nb_frames, fps, memory in bench_video():
+        print('%6d frames %8.1f frames/s %8.0f MB' % (nb_frames, fps, memory))
@@ -0,0 +1,150 @@
+"""
+Write synthetic MusicXML scores of any size, to test and benchmark the parser and the plots at scale
+
+The scores are random but reproducible (given the seed). They have several parts with two voices
+(<backup>, <forward>), chords, triplets (<time-modification>), changes of key, time signature and
+tempo, a pickup measure, measures that only have a <forward>, and accidentals up to double sharps/flats:
+
+    python synthetic_score.py score.mxl --parts 4 --measures 2000
+"""
+import os
+import random
+import zipfile
+import argparse
+
+#the divisions of a quarter note, 12 so the triplets of eighths last a whole number of divisions
+DIVISIONS = 12
+#the time signatures used by the changes of time signature
+TIME_SIGNATURES = [(4, 4), (3, 4), (6, 8), (5, 4), (2, 2), (7, 8)]
+#(duration in divisions, type, dots) of the single notes
+NOTE_VALUES = [(48, 'whole', 0), (24, 'half', 0), (18, 'quarter', 1), (12, 'quarter', 0), (6, 'eighth', 0),
+               (3, '16th', 0)]
+STEPS = 'CDEFGAB'
+
+CONTAINER = '''<?xml version="1.0" encoding="UTF-8"?>
+<container>
+  <rootfiles>
+    <rootfile full-path="score.xml" media-type="application/vnd.recordare.musicxml+xml"/>
+  </rootfiles>
+</container>
+'''
+
+def synthetic_score(parts=2, measures=100, chords=0.2, tuplets=0.1, changes=16, max_alter=2, seed=0):
+    """return a MusicXML score as a string
+
+    A measure of 4/4 has about 9 notes in each part.
+    Keyword arguments:
+    parts -- the number of parts
+    measures -- the number of measures of each part, the first one is a pickup measure
+    chords -- the probability that a note is a chord of two to four notes
+    tuplets -- the probability of a triplet of eighths instead of a note
+    changes -- the key, the time signature and the tempo change every this number of measures, 0 never
+    max_alter -- the biggest alteration of the notes, 2 for double sharps and double flats
+    seed -- the seed of the random numbers, the same arguments always give the same score
+    """
+    rand = random.Random(seed)
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<!DOCTYPE score-partwise PUBLIC "-//Recordare//DTD MusicXML 3.1 Partwise//EN" '
+             '"http://www.musicxml.org/dtds/partwise.dtd">',
+             '<score-partwise version="3.1">', '<part-list>']
+    for part in range(parts):
+        lines.append('<score-part id="P%d"><part-name>Part %d</part-name></score-part>' % (part + 1, part + 1))
+    lines.append('</part-list>')
+
+    #the changes are the same in all the parts
+    signatures = []
+    time_signature, key, tempo = (4, 4), 0, 120
+    for measure in range(measures):
+        attributes = measure == 0 or (changes and measure % changes == 0)
+        if attributes and measure > 0:
+            time_signature = rand.choice(TIME_SIGNATURES)
+            key = rand.randint(-7, 7)
+            tempo = rand.randint(40, 200)
+        signatures.append((attributes, time_signature, key, tempo))
+
+    for part in range(parts):
+        lines.append('<part id="P%d">' % (part + 1))
+        for measure, (attributes, (beats, beat_type), key, tempo) in enumerate(signatures):
+            lines.append('<measure number="%d">' % measure)
+            if attributes:
+                lines.append('<attributes>%s<key><fifths>%d</fifths><mode>%s</mode></key>'
+                             '<time><beats>%d</beats><beat-type>%d</beat-type></time></attributes>'
+                             % ('<divisions>%d</divisions>' % DIVISIONS if measure == 0 else '',
+                                key, rand.choice(['major', 'minor']), beats, beat_type))
+                lines.append('<direction><sound tempo="%d"/></direction>' % tempo)
+            length = beats * DIVISIONS * 4 // beat_type
+            if measure == 0:
+                #pickup measure of one quarter
+                length = DIVISIONS
+            if part % 2 == 1 and measure % 7 == 3:
+                #a measure without notes, the parser replaces the forward by a rest
+                lines.append('<forward><duration>%d</duration></forward>' % length)
+            else:
+                lines.extend(_get_voice(rand, length, 1, chords, tuplets, max_alter))
+                #the second voice starts after a forward in half of the measures
+                lines.append('<backup><duration>%d</duration></backup>' % length)
+                start = 0
+                if length >= 2 * DIVISIONS and rand.random() < 0.5:
+                    start = DIVISIONS
+                    lines.append('<forward><duration>%d</duration></forward>' % start)
+                lines.extend(_get_voice(rand, length - start, 2, chords, tuplets, max_alter))
+            lines.append('</measure>')
+        lines.append('</part>')
+    lines.append('</score-partwise>')
+    return '\n'.join(lines)
+
+def _get_voice(rand, length, voice, chords, tuplets, max_alter):
+    """return the xml lines of the notes of one voice that fill length divisions"""
+    lines = []
+    while length > 0:
+        if length >= DIVISIONS and rand.random() < tuplets:
+            for i in range(3):
+                lines.append(_get_note(rand, DIVISIONS // 3, 'eighth', 0, voice, max_alter,
+                                       tuplet='<time-modification><actual-notes>3</actual-notes>'
+                                              '<normal-notes>2</normal-notes></time-modification>'))
+            length -= DIVISIONS
+            continue
+        duration, note_type, dots = rand.choice([value for value in NOTE_VALUES if value[0] <= length])
+        rest = rand.random() < 0.1
+        lines.append(_get_note(rand, duration, note_type, dots, voice, max_alter, rest=rest))
+        if not rest and rand.random() < chords:
+            for i in range(rand.randint(1, 3)):
+                lines.append(_get_note(rand, duration, note_type, dots, voice, max_alter, chord=True))
+        length -= duration
+    return lines
+
+def _get_note(rand, duration, note_type, dots, voice, max_alter, rest=False, chord=False, tuplet=''):
+    """return the xml of a random note"""
+    if rest:
+        pitch = '<rest/>'
+    else:
+        alter = rand.randint(-max_alter, max_alter) if rand.random() < 0.3 else 0
+        pitch = '<pitch><step>%s</step>%s<octave>%d</octave></pitch>' % (
+            rand.choice(STEPS), '<alter>%d</alter>' % alter if alter else '', rand.randint(2, 6))
+    return '<note>%s%s<duration>%d</duration><voice>%d</voice><type>%s</type>%s%s</note>' % (
+        '<chord/>' if chord else '', pitch, duration, voice, note_type, '<dot/>' * dots, tuplet)
+
+def write_score(filepath, **kwargs):
+    """write a synthetic score in a .xml file, or a compressed .mxl file, the arguments are the ones of synthetic_score"""
+    score = synthetic_score(**kwargs)
+    if os.path.splitext(filepath)[1].lower() == '.mxl':
+        with zipfile.ZipFile(filepath, 'w', zipfile.ZIP_DEFLATED) as mxlzip:
+            mxlzip.writestr('META-INF/container.xml', CONTAINER)
+            mxlzip.writestr('score.xml', score)
+    else:
+        with open(filepath, 'w') as f:
+            f.write(score)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('filepath', help='the .xml or .mxl file')
+    parser.add_argument('--parts', type=int, default=2)
+    parser.add_argument('--measures', type=int, default=100)
+    parser.add_argument('--chords', type=float, default=0.2)
+    parser.add_argument('--tuplets', type=float, default=0.1)
+    parser.add_argument('--changes', type=int, default=16)
+    parser.add_argument('--max-alter', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_score(args.filepath, parts=args.parts, measures=args.measures, chords=args.chords, tuplets=args.tuplets,
+                changes=args.changes, max_alter=args.max_alter, seed=args.seed)
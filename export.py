@@ -0,0 +1,143 @@
+"""
+Draw the static charts of many pieces in image files
+"""
+import os
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from pitchplots.reader import read_piece
+from pitchplots.static import TonnetzRenderer, CircleRenderer, LineRenderer
+
+#the renderer of each type of chart
+RENDERERS = {'tonnetz': TonnetzRenderer, 'circle': CircleRenderer, 'line': LineRenderer}
+
+#the renderers of the charts that are updated for each piece, in each process
+_renderers = {}
+
+class ExportError(Exception):
+    """Exception thrown when the charts to export are not valid."""
+    pass
+
+def export_charts(pieces, charts, directory, format='png', workers=None, **kwargs):
+    """draw the charts of many pieces in a pool of processes and register them in image files, return the results
+
+    A piece or a chart that fails does not stop the run, its error is returned with the others.
+    The charts whose layout does not depend on the piece (tonnetz with a center, circle in pitch classes,
+    line in pitch classes or with xmin and xmax) are built once in each process and only updated for
+    the next pieces, the other charts are built for each piece.
+    Keyword arguments:
+    pieces -- a glob pattern (e.g. 'corpus/**/*.mxl') or a list of paths to .csv, .mxl or .xml files,
+        of DataFrames or of (store, piece_id) of a reader.CorpusStore, or a dict name: piece to choose the names of the files
+    charts -- the list of the charts, each chart is a dict with its 'type' ('tonnetz', 'circle' or 'line'),
+        its 'name' (by default the type) and the arguments of the function, e.g. {'type': 'tonnetz', 'radius': 4}
+    directory -- the directory of the image files, they are named piece_chart.format
+    format -- the format of the images, 'png', 'svg' or another format of matplotlib.figure.Figure.savefig
+    workers -- the number of processes, by default one per core, 1 draws in the current process
+    **kwargs -- these arguments are redirected to matplotlib.figure.Figure.savefig, like dpi
+    return:
+    files -- the list of the image files that were registered
+    errors -- dictionary (piece name, chart name): exception of the charts that could not be drawn
+    figures_per_second -- the number of images registered by second
+    """
+    pieces = _get_named_pieces(pieces)
+    charts = _check_charts(charts)
+    os.makedirs(directory, exist_ok=True)
+
+    start = time.perf_counter()
+    args = [(name, piece, charts, directory, format, kwargs) for name, piece in pieces]
+    if workers == 1:
+        try:
+            results = [_export_piece(*arg) for arg in args]
+        finally:
+            _renderers.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # send the pieces by chunks so each process does not wait for every single piece
+            chunksize = max(1, len(args)//(4*(workers or os.cpu_count() or 1)))
+            results = list(executor.map(_export_piece, *zip(*args), chunksize=chunksize)) if args else []
+
+    files = []
+    errors = {}
+    for (name, piece), result in zip(pieces, results):
+        for chart_name, filepath in result:
+            if isinstance(filepath, Exception):
+                errors[(name, chart_name)] = filepath
+            else:
+                files.append(filepath)
+    seconds = time.perf_counter() - start
+    return (files, errors, len(files)/seconds if seconds > 0 else 0)
+
+def _get_named_pieces(pieces):
+    """return the list of (name, piece) of the pieces given to export_charts"""
+    if isinstance(pieces, dict):
+        return list(pieces.items())
+    if isinstance(pieces, str):
+        pieces = sorted(glob.glob(pieces, recursive=True))
+
+    named_pieces = []
+    names = set()
+    for index, piece in enumerate(pieces):
+        if isinstance(piece, pd.DataFrame):
+            name = 'piece_%d' % index
+        else:
+            #the pieces of a corpus store are named by their id
+            name = os.path.splitext(os.path.basename(str(piece[1] if isinstance(piece, tuple) else piece)))[0]
+            #two files with the same name in different directories
+            if name in names:
+                name = '%s_%d' % (name, index)
+        names.add(name)
+        named_pieces.append((name, piece))
+    return named_pieces
+
+def _check_charts(charts):
+    """return the charts with their name, raise an ExportError if a type is unknown or two charts have the same name"""
+    checked_charts = []
+    for chart in charts:
+        if chart.get('type') not in RENDERERS:
+            raise ExportError('The type of chart must be one of %s, not %r' % (sorted(RENDERERS), chart.get('type')))
+        chart = dict(chart)
+        chart.setdefault('name', chart['type'])
+        if chart['name'] in [c['name'] for c in checked_charts]:
+            raise ExportError('Two charts are named %r, give them different names' % chart['name'])
+        checked_charts.append(chart)
+    return checked_charts
+
+def _has_fixed_layout(chart):
+    """return True if the layout of the chart does not depend on the piece, so its renderer can be updated"""
+    if chart['type'] == 'tonnetz':
+        return not pd.isnull(chart.get('center'))
+    if chart['type'] == 'circle':
+        return bool(chart.get('pitch_class_display'))
+    return bool(chart.get('pitch_class_display')) or (chart.get('xmin') is not None and chart.get('xmax') is not None)
+
+def _export_piece(name, piece, charts, directory, format, savefig_kwargs):
+    """register the charts of one piece, return the list of (chart name, filepath or exception)"""
+    results = []
+    try:
+        #the files are read once for all the charts
+        piece = read_piece(piece)
+    except Exception as error:
+        return [(chart['name'], error) for chart in charts]
+
+    for chart in charts:
+        filepath = os.path.join(directory, '%s_%s.%s' % (name, chart['name'], format))
+        arguments = {key: value for key, value in chart.items() if key not in ('type', 'name')}
+        arguments['show'] = False
+        try:
+            if _has_fixed_layout(chart):
+                key = repr(sorted(chart.items()))
+                if key in _renderers:
+                    fig = _renderers[key].update(piece)
+                else:
+                    _renderers[key] = RENDERERS[chart['type']](piece, **arguments)
+                    fig = _renderers[key].fig
+            else:
+                fig = RENDERERS[chart['type']](piece, **arguments).fig
+            fig.savefig(filepath, format=format, **savefig_kwargs)
+            results.append((chart['name'], filepath))
+        except Exception as error:
+            results.append((chart['name'], error))
+    return results
@@ -1,9 +1,18 @@
 """
 stack of functions for the program
 """
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
 
+#the steps in the order of the line of fifths
+TPC_STEPS = 'FCGDAEB'
+#pitch class of the steps without accidentals
+STEP_PC = {'C':0, 'D':2, 'E':4, 'F':5, 'G':7, 'A':9, 'B':11}
+#number of different notes kept in the cache of the tpc spellings
+TPC_CACHE_SIZE = 1024
+
 def get_dic_nei(pitch_class_display):
     """for musical_plot_hex it need the neighbouring notes in the hexagonal shape, return dictionary
         ref is the list of note that we are refering to
@@ -46,6 +55,72 @@ def get_dic_nei(pitch_class_display):
                          1, 1, 0, 0, 0, 1]}
     return dic_nei
 
+@lru_cache(maxsize=2)
+def get_nei_table(pitch_class_display):
+    """return the neighbours of get_dic_nei as a dictionary (ref, pos): (note, acc)"""
+    dic_nei = get_dic_nei(pitch_class_display)
+    if pitch_class_display:
+        accs = [0]*len(dic_nei['ref'])
+    else:
+        accs = dic_nei['acc']
+    return {(ref, pos): (note, acc) for ref, pos, note, acc in zip(dic_nei['ref'], dic_nei['pos'], dic_nei['note'], accs)}
+
+@lru_cache(maxsize=64)
+def get_hex_layout(center_note, center_acc, radius, pitch_class_display):
+    """return the hexagonal grid of the tonnetz, tuple of (pos, note, acc)
+
+    The first hexagon is the center at the position (0, 0, 0), then the hexagons
+    are given layer by layer, each one being defined from its neighbour of the layer before.
+    The result is cached, so the layout of a tonnetz is only computed once.
+    Keyword arguments:
+    center_note -- the note of the center, the step if tpc or the pitch class if pitch_class_display
+    center_acc -- the accidentals of the center (not used if pitch_class_display)
+    radius -- the number of layers around the center
+    pitch_class_display -- if True the notes are pitch classes, if not steps with their accidentals
+    """
+    nei_table = get_nei_table(pitch_class_display)
+    if pitch_class_display:
+        #the pitch classes are int, a float center (e.g. 2.0) would give the labels '2.0'
+        center_note = int(center_note)
+        center_acc = 0
+
+    #give the direction to look to for the nearest define hexagon
+    x_list = [-1, 1, 0, 0, 1, -1]
+    y_list = [1, -1, -1, 1, 0, 0]
+    z_list = [0, 0, 1, -1, -1, 1]
+
+    layout = [((0, 0, 0), center_note, center_acc)]
+    #position: (note, acc) of the hexagons already define
+    dic_pos = {(0, 0, 0): (center_note, center_acc)}
+    pos = [0, 0, 0]
+    for layer in range(radius + 1): #for each layer
+        for i in range(3): #for x,y,z
+            for j in range(2): #for negative and positive value
+                for k in range(layer): #to do the number of hexagon on sides
+                    #set the position of the hexagon
+                    pos[(0 + i) % 3] = layer * ((-1) ** j)
+                    pos[(1 + i) % 3] = (-layer + k) * ((-1) ** j)
+                    pos[(2 + i) % 3] = (-k) * ((-1) ** j)
+
+                    #position of the nearest hexagon already defined
+                    pos_ser = (
+                        pos[0] + x_list[j+i*2],
+                        pos[1] + y_list[j+i*2],
+                        pos[2] + z_list[j+i*2])
+
+                    #position of the hexagon seen from the nearest one
+                    pos_ser_n = (
+                        x_list[j+i*2] * (-1),
+                        y_list[j+i*2] * (-1),
+                        z_list[j+i*2] * (-1))
+
+                    ref_note, ref_acc = dic_pos[pos_ser]
+                    current_note, delta_acc = nei_table[(ref_note, pos_ser_n)]
+                    current_acc = ref_acc + delta_acc
+                    dic_pos[tuple(pos)] = (current_note, current_acc)
+                    layout.append((tuple(pos), current_note, current_acc))
+    return tuple(layout)
+
 def sampling(value, sampling_frequency):
     """return the sampled value at a given sampling frequency"""
     ret_value = 0
@@ -72,29 +147,31 @@ def put_flat_sharp(step, acc):
             ret_note = ret_note + 'b'
     return ret_note # not needed
 
-def is_tpc(note):
-    """check if note has the same format as tpc, return boolean"""
-    s_tpc_values_1 = pd.Series(['F', 'C', 'G', 'D', 'A', 'E', 'B'])
-    s_tpc_values_2 = pd.Series(['b', '#'])
+@lru_cache(maxsize=TPC_CACHE_SIZE)
+def get_tpc_spelling(note):
+    """return (step, acc, pc, fifth number) of a note in tpc format, None if it is not a tpc note
 
-    correct_format_tpc = True
-    count = 0
+    The result is cached so that the notes of a piece are only read once.
+    """
+    note = str(note)
+    if note == '' or note[0] not in TPC_STEPS:
+        return None
+    acc = 0
+    for i in note[1:]:
+        if i == '#':
+            acc = acc + 1
+        elif i == 'b':
+            acc = acc - 1
+        else:
+            return None
+    step = note[0]
+    pc = (STEP_PC[step] + acc) % 12
+    fifth = TPC_STEPS.index(step) + acc * 7
+    return (step, acc, pc, fifth)
 
-    for i in str(note):
-        count = count + 1
-
-        #check first character
-        if (count == 1): 
-            if (i == s_tpc_values_1).any() == False:
-                correct_format_tpc = False
-                    
-        #check the flats and sharps
-        else: 
-            if (i == s_tpc_values_2).any() == False:
-                correct_format_tpc = False
-        if correct_format_tpc == False:
-            break
-    return correct_format_tpc
+def is_tpc(note):
+    """check if note has the same format as tpc, return boolean"""
+    return get_tpc_spelling(str(note)) is not None
 
 def is_pc(note):
     """check if note has the same format as pc, return boolean"""
@@ -102,42 +179,32 @@ def is_pc(note):
 
 def get_acc(note):
     """get the acc from a tpc format, return int"""
-    if is_tpc(note):
-        acc = 0
-        for i in str(note):
-            if i == '#':
-                acc = acc + 1
-            if i == 'b':
-                acc = acc - 1
-        return acc
+    spelling = get_tpc_spelling(str(note))
+    if spelling is not None:
+        return spelling[1]
 
 def get_step(note):
     """get the step from a tpc format, return str"""
-    if is_tpc(note):
-        step = ''
-        step = str(note)[0]
-        return step
+    spelling = get_tpc_spelling(str(note))
+    if spelling is not None:
+        return spelling[0]
 
 def get_pc(note):
     """get the pitch class from a tpc value, return int"""
-    pc = np.NaN
-    s_tpc_pc = pd.Series(data=[0, 2, 4, 5, 7, 9, 11], index=['C', 'D', 'E', 'F', 'G', 'A', 'B'])
+    pc = np.nan
     if pd.isnull(note) == False:
-        pc = s_tpc_pc.at[get_step(note)]
-        pc = pc + get_acc(note)
-        ###heck modulo
-        while pc < 0:
-            pc = pc + 12
-        while pc > 11:
-            pc = pc - 12
+        spelling = get_tpc_spelling(str(note))
+        if spelling is None:
+            raise KeyError(note)
+        pc = spelling[2]
     return pc
 
 def get_fifth_nb(note):
     """return the position of the note in the fifth line"""
-    step = get_step(note)
-    acc = get_acc(note)
-    dic = {'F':0, 'C':1, 'G':2, 'D':3, 'A':4, 'E':5, 'B':6}
-    return dic[step] + acc * 7
+    spelling = get_tpc_spelling(str(note))
+    if spelling is None:
+        raise KeyError(note)
+    return spelling[3]
 
 #change note to fifth_number Use same dictionnary
 def get_fifth_note(note):
@@ -161,3 +228,92 @@ def get_fifth_note(note):
     if copy_note == 6: ret_note = 'B'
     ret_note = put_flat_sharp(ret_note, count)
     return ret_note
+
+def get_tpc_spelling_array(notes, field, fill=np.nan, strict=False):
+    """return one field of the tpc spelling for every note of a Series or an array, return ndarray
+
+    Each different note is only read once, the values are then spread on all the notes.
+    Keyword arguments:
+    notes -- Series or array of notes in tpc format
+    field -- the position in the spelling (0 step, 1 acc, 2 pc, 3 fifth number)
+    fill -- the value given to the null notes, and to the notes not in tpc format if not strict
+    strict -- if True raise a KeyError for the notes that are not in tpc format
+    """
+    codes, uniques = pd.factorize(np.asarray(notes, dtype=object))
+    table = []
+    for note in uniques:
+        spelling = get_tpc_spelling(str(note))
+        if spelling is not None:
+            table.append(spelling[field])
+        elif strict:
+            raise KeyError(note)
+        else:
+            table.append(fill)
+    #the null notes have the code -1
+    table.append(fill)
+    return np.array(table, dtype=object)[codes]
+
+def get_acc_array(notes):
+    """get the acc of every note of a Series or an array in tpc format, return ndarray
+
+    The notes that are not in tpc format give nan, the array is of int if there is none.
+    """
+    acc = get_tpc_spelling_array(notes, 1).astype(float)
+    if not np.isnan(acc).any():
+        acc = acc.astype(int)
+    return acc
+
+def get_step_array(notes):
+    """get the step of every note of a Series or an array in tpc format, return ndarray (None if not tpc)"""
+    return get_tpc_spelling_array(notes, 0, fill=None)
+
+def get_pc_array(notes):
+    """get the pitch class of every note of a Series or an array in tpc format, return ndarray
+
+    The null notes give nan, the array is of int if there is no null note.
+    """
+    pc = get_tpc_spelling_array(notes, 2, strict=True).astype(float)
+    if not np.isnan(pc).any():
+        pc = pc.astype(int)
+    return pc
+
+def get_fifth_nb_array(notes):
+    """return the position on the fifth line of every note of a Series or an array, return ndarray"""
+    fifth = get_tpc_spelling_array(notes, 3, fill=None, strict=True)
+    if pd.isnull(fifth).any():
+        raise KeyError(np.nan)
+    return fifth.astype(int)
+
+def put_flat_sharp_array(steps, accs):
+    """get the steps and their accs and return the notes in tpc notation, return ndarray of str"""
+    accs = np.asarray(accs, dtype=int)
+    #np.char.multiply does not accept empty arrays
+    if accs.size == 0:
+        return np.array([], dtype=object)
+    sharps = np.char.multiply('#', np.maximum(accs, 0))
+    flats = np.char.multiply('b', np.maximum(-accs, 0))
+    return np.char.add(np.char.add(np.asarray(steps, dtype=str), sharps), flats).astype(object)
+
+def get_fifth_note_array(fifths):
+    """return the notes of the fifth numbers of a Series or an array, return ndarray of str"""
+    fifths = np.asarray(fifths).astype(int)
+    steps = np.array(list(TPC_STEPS))[fifths % 7]
+    return put_flat_sharp_array(steps, fifths // 7)
+
+def sampling_array(values, sampling_frequency):
+    """return the values of a Series or an array sampled at a given sampling frequency, return ndarray"""
+    values = np.asarray(values, dtype=float)
+    period = 1/sampling_frequency
+    rest = values % period
+    return np.where(rest <= period/2, values - rest, values - rest + period)
+
+def sampling_frames(values, sampling_frequency):
+    """return the index of the frame of each value of a Series or an array, return ndarray of int
+
+    The values are rounded to the frames like sampling does, so that
+    sampling_frames(values, f)/f and sampling_array(values, f) give the same time.
+    """
+    values = np.asarray(values, dtype=float)
+    period = 1/sampling_frequency
+    frames, rest = np.divmod(values, period)
+    return (frames + (rest > period/2)).astype(int)
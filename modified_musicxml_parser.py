@@ -170,8 +170,29 @@ class MusicXMLDocument(object):
             MusicXMLParseError: if the file cannot be parsed.
         """
         score = None
+        with MusicXMLDocument._open_score(filename) as score_file:
+            try:
+                tree = ET.parse(score_file)
+                score = tree.getroot()
+            except ET.ParseError as exception:
+                raise MusicXMLParseError(exception)
+
+        return score
+
+    @staticmethod
+    def _open_score(filename):
+        """Given a MusicXML file, return the score as a binary file object.
+        If the file is compress (ends in .mxl), the score is uncompressed
+        while it is read
+        Args:
+            filename: The path of a MusicXML file
+        Returns:
+            The score as a binary file object.
+        Raises:
+            MusicXMLParseError: if the score cannot be found in the file.
+        """
         if filename.endswith('.mxl'):
-            # Compressed MXL file. Uncompress in memory.
+            # Compressed MXL file. Uncompress while reading.
             try:
                 mxlzip = zipfile.ZipFile(filename)
             except zipfile.BadZipfile as exception:
@@ -233,20 +254,10 @@ class MusicXMLDocument(object):
                 compressed_file_info = [x for x in infolist if x.filename == compressed_file_name][0]
             except IndexError:
                 raise MusicXMLParseError('Score file %s not found in zip archive' % compressed_file_name)
-            score_string = mxlzip.read(compressed_file_info)
-            try:
-                score = ET.fromstring(score_string)
-            except ET.ParseError as exception:
-                raise MusicXMLParseError(exception)
+            return mxlzip.open(compressed_file_info)
         else:
             # Uncompressed XML file.
-            try:
-                tree = ET.parse(filename)
-                score = tree.getroot()
-            except ET.ParseError as exception:
-                raise MusicXMLParseError(exception)
-
-        return score
+            return open(filename, 'rb')
 
     def _parse(self):
         """Parse the uncompressed MusicXML document."""
@@ -358,6 +369,73 @@ class MusicXMLDocument(object):
         return tempos
 
 
+class MusicXMLStream(object):
+    """Streaming representation of a MusicXML Document.
+    Reads the .xml or .mxl file with ET.iterparse and parses one <measure>
+    at a time instead of loading the whole document in memory.
+    Every <measure> element is removed from the tree once it is parsed, and
+    the parsed Measure and Note objects do not keep their xml elements,
+    so the memory used does not depend on the length of the score.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        # ScoreParts indexed by id.
+        self._score_parts = {}
+        self.midi_resolution = STANDARD_PPQ
+        self._state = MusicXMLParserState()
+        # Total time in seconds
+        self.total_time_secs = 0
+
+    def iter_measures(self):
+        """Yield (Part, Measure) for every measure of every part, in the order of the file.
+        The Part objects do not hold their measures.
+        Raises:
+            MusicXMLParseError: if the file cannot be parsed.
+        """
+        depth = 0
+        xml_part = None
+        part = None
+        with MusicXMLDocument._open_score(self.filename) as score_file:
+            try:
+                for event, element in ET.iterparse(score_file, events=('start', 'end')):
+                    if event == 'start':
+                        depth += 1
+                        if depth == 1:
+                            score = element
+                        elif depth == 2 and element.tag == 'part':
+                            # The attributes of the <part> are known at its start
+                            xml_part = element
+                            part = Part(xml_part, self._score_parts, self._state, parse_measures=False)
+                        continue
+
+                    if depth == 3 and element.tag == 'measure' and part is not None:
+                        measure = part.parse_measure(element)
+                        # Do not keep the xml elements alive with the parsed objects
+                        measure.xml_measure = None
+                        for note in measure.notes:
+                            note.xml_note = None
+                        xml_part.remove(element)
+                        element.clear()
+                        yield part, measure
+                    elif depth == 2:
+                        if element.tag == 'part-list':
+                            for child in element:
+                                if child.tag == 'score-part':
+                                    score_part = ScorePart(child)
+                                    self._score_parts[score_part.id] = score_part
+                        elif element.tag == 'part':
+                            part = None
+                            xml_part = None
+                            if self._state.time_position > self.total_time_secs:
+                                self.total_time_secs = self._state.time_position
+                        score.remove(element)
+                        element.clear()
+                    depth -= 1
+            except ET.ParseError as exception:
+                raise MusicXMLParseError(exception)
+
+
 class ScorePart(object):
     """"Internal representation of a MusicXML <score-part>.
     A <score-part> element contains MIDI program and channel info
@@ -403,15 +481,18 @@ class ScorePart(object):
 class Part(object):
     """Internal represention of a MusicXML <part> element."""
 
-    def __init__(self, xml_part, score_parts, state):
+    def __init__(self, xml_part, score_parts, state, parse_measures=True):
         self.id = ''
         self.score_part = None
         self.measures = []
         self._state = state
-        self._parse(xml_part, score_parts)
+        self._parse(xml_part, score_parts, parse_measures)
 
-    def _parse(self, xml_part, score_parts):
-        """Parse the <part> element."""
+    def _parse(self, xml_part, score_parts, parse_measures=True):
+        """Parse the <part> element.
+        If parse_measures is False only the attributes of the <part> are read
+        and the measures are left to parse_measure.
+        """
         if 'id' in xml_part.attrib:
             self.id = xml_part.attrib['id']
         if self.id in score_parts:
@@ -427,14 +508,21 @@ class Part(object):
         self._state.midi_program = self.score_part.midi_program
         self._state.transpose = 0
 
+        if not parse_measures:
+            return
+
         xml_measures = xml_part.findall('measure')
         for measure in xml_measures:
-            # Issue #674: Repair measures that do not contain notes
-            # by inserting a whole measure rest
-            self._repair_empty_measure(measure)
-            parsed_measure = Measure(measure, self._state)
+            parsed_measure = self.parse_measure(measure)
             self.measures.append(parsed_measure)
 
+    def parse_measure(self, xml_measure):
+        """Parse a <measure> element of this part and return the Measure."""
+        # Issue #674: Repair measures that do not contain notes
+        # by inserting a whole measure rest
+        self._repair_empty_measure(xml_measure)
+        return Measure(xml_measure, self._state)
+
     def _repair_empty_measure(self, measure):
         """Repair a measure if it is empty by inserting a whole measure rest.
         If a <measure> only consists of a <forward> element that advances
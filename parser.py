@@ -3,12 +3,33 @@ Parse .xml or .mxl files and return a pandas DataFrameself.
 """
 import sys
 import os
+import glob
+import pickle
+import shutil
+import hashlib
+from itertools import groupby
+from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 import numpy as np
 import pandas as pd
 
 # import xml parser from magenta
-from pitchplots.modified_musicxml_parser import MusicXMLDocument
+from pitchplots.modified_musicxml_parser import MusicXMLDocument, MusicXMLStream
+from pitchplots.functions import get_fifth_nb_array
+from pitchplots.profiling import stage, profiled
+
+#version of the DataFrames of xml_to_csv, the files parsed by an older version are not read from the cache
+PARSE_CACHE_VERSION = 2
+#size that the parse cache can use on the disk by default, in bytes
+PARSE_CACHE_MAX_BYTES = 1024 * 2**20
+#when the cache is too big it is reduced to this part of its maximum size, so it is not scanned at each write
+PARSE_CACHE_LOW_WATER = 0.9
+#the formats of the files where the DataFrames can be registered, feather and parquet need pyarrow
+SAVE_FORMATS = ('csv', 'feather', 'parquet', 'npz')
+#the fields of the notes in the corpus stores, see corpus_to_store, the tpc are given by their fifth number
+STORE_DTYPE = np.dtype([('fifth', '<i2'), ('pc', 'i1'), ('pitch', 'i1'), ('duration', '<f8'), ('onset', '<f8'),
+                        ('onset_seconds', '<f8'), ('measure_no', '<i4'), ('qpm', '<f8')])
 
 class ParseError(Exception):
     """
@@ -16,18 +37,245 @@ class ParseError(Exception):
     """
     pass
 
+class ParseCache(object):
+    """Cache on the disk of the DataFrames of xml_to_csv, keyed by the content of the files.
+
+    A file that was already parsed with the same duration is read from the cache, even if it was
+    moved or renamed, instead of being parsed again. The DataFrames are registered with pickle in
+    the directory, the ones that were used the least recently are removed when the cache uses more
+    than max_bytes, until it uses less than PARSE_CACHE_LOW_WATER of it. The same directory can be used
+    by several processes, the size of the cache is counted from the files that each process writes and
+    the directory is only scanned again when that count goes over max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=PARSE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        # the bytes used by the cache, counted once here then increased by put
+        self._nbytes = sum(size for path, size, mtime in self._get_files())
+
+    def get_key(self, filepath, duration):
+        """return the key of the xml/mxl file parsed with the duration, from the hash of its content"""
+        digest = hashlib.sha256()
+        with open(filepath, 'rb') as xml_file:
+            for block in iter(lambda: xml_file.read(2**20), b''):
+                digest.update(block)
+        digest.update(('%s %d' % (duration, PARSE_CACHE_VERSION)).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """return the DataFrame of the key, None if it is not in the cache"""
+        path = self._get_path(key)
+        try:
+            df = pd.read_pickle(path)
+            # the modification time tells which files were used recently
+            os.utime(path)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+        return df
+
+    def put(self, key, df):
+        """register the DataFrame of the key, then remove the least recently used ones if the cache is too big"""
+        path = self._get_path(key)
+        # written in another file first so the other processes never read a partial file
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        try:
+            self._nbytes += os.path.getsize(path)
+        except OSError:
+            pass
+        if self._nbytes > self.max_bytes:
+            self._evict()
+
+    def clear(self):
+        """remove all the DataFrames from the cache"""
+        for path, size, mtime in self._get_files():
+            self._remove(path)
+        self._nbytes = 0
+
+    def _get_path(self, key):
+        """return the path of the file of a key"""
+        return os.path.join(self.directory, key + '.pkl')
+
+    def _get_files(self):
+        """return the list of (path, size, modification time) of the files of the cache"""
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.pkl'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict(self):
+        """remove the least recently used files until the cache uses less than PARSE_CACHE_LOW_WATER of max_bytes"""
+        # the directory is scanned again, the other processes can have written or removed files
+        files = self._get_files()
+        nbytes = sum(size for path, size, mtime in files)
+        if nbytes > self.max_bytes:
+            # keep at least the last file, it has just been used
+            for path, size, mtime in sorted(files, key=itemgetter(2))[:-1]:
+                if nbytes <= self.max_bytes * PARSE_CACHE_LOW_WATER:
+                    break
+                self._remove(path)
+                nbytes -= size
+        self._nbytes = nbytes
+
+    @staticmethod
+    def _remove(path):
+        """remove a file of the cache, it can have been removed by another process"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+#the cache used by xml_to_csv and the readers by default, see set_parse_cache
+_parse_cache = None
+
+def set_parse_cache(cache):
+    """use a parse cache by default in xml_to_csv and the readers, return it
+
+    Keyword arguments:
+    cache -- a ParseCache, or the path of its directory, None to stop using a cache
+    """
+    global _parse_cache
+    if isinstance(cache, str):
+        cache = ParseCache(cache)
+    _parse_cache = cache
+    return cache
+
+def get_parse_cache():
+    """return the parse cache used by default, None if there is none"""
+    return _parse_cache
+
 ### DEFINE PARSER
+@profiled('parser.xml_to_csv')
 def xml_to_csv(filepath=os.path.dirname(os.path.realpath(__file__))+'\\'+'data'+'\\'+'data_example.mxl',
-               filename=None, save_csv=True, duration='whole_note'):
+               filename=None, save_csv=True, duration='whole_note', streaming=False, cache=None,
+               format='csv'):
     """return the Dataframe, and possbily register it in csv, of the musicxml file
     
     Keyword arguments:
     filepath -- absolute path to the xml file by default goes to the example file
     filename -- give the name of the .csv file, by default give the same name as the .mxl file
     save_cvs -- if True save the csv file in the csv directory or at the given path
+    format -- the format of the registered file: 'csv', 'feather', 'parquet' (these two need pyarrow)
+              or 'npz', the binary formats are read faster and by columns, see reader.read_piece
     duration -- define of the duration will be in seconds or relative to a whole note
                 (possible values: 'seconds' or 'whole_note'(default value))
+    streaming -- if True the file is read one measure at a time instead of being loaded
+                 in memory, for the very long scores
+    cache -- the ParseCache where the DataFrame is read if the file was already parsed,
+             by default the one given to set_parse_cache if any, False to parse the file anyway
     """
+    if cache is None:
+        cache = _parse_cache
+    if cache:
+        with stage('parser.cache'):
+            try:
+                key = cache.get_key(filepath, duration)
+            except OSError:
+                raise ParseError('There is a problem with the path to the xml/mxl file or the files are not standard.')
+            df = cache.get(key)
+        if df is None:
+            df = _parse_xml(filepath, duration, streaming)
+            cache.put(key, df)
+        else:
+            #the same file can have been parsed at another path
+            df['filepath'] = filepath
+    else:
+        df = _parse_xml(filepath, duration, streaming)
+    
+    if save_csv:
+        if format not in SAVE_FORMATS:
+            raise ParseError('The format must be one of %s, not %r' % (SAVE_FORMATS, format))
+        #  path to the csv directory
+        csv_path = os.path.dirname(sys.argv[0])+r'/csv'
+        # get the name from the xml file and put in csv dir
+        if pd.isnull(filename):
+            if not os.path.exists(csv_path):
+                os.makedirs(csv_path)
+            filename = os.path.basename(filepath).split('.')[0] + '.' + format
+            save_dataframe(df, os.path.join(csv_path,filename), format)
+        # if filename is a path, register the csv file at the given path
+        elif "\\" in filename or "/" in filename:
+            save_dataframe(df, filename, format)
+        # get the name and put it in csv folder
+        else:
+            # check if the csv folder already exist if not create one
+            if not os.path.exists(csv_path):
+                os.makedirs(csv_path)
+            save_dataframe(df, os.path.join(csv_path,filename), format)
+
+    return df
+
+@profiled('parser.save')
+def save_dataframe(df, filepath, format='csv'):
+    """register the DataFrame of a piece in a file
+
+    Keyword arguments:
+    df -- the DataFrame, e.g. given by xml_to_csv
+    filepath -- the path of the file
+    format -- 'csv', 'feather' or 'parquet' (these two need pyarrow), or 'npz' where each column is
+              a numpy array, the strings columns are an array of their values and one of their codes (-1 if missing)
+    """
+    if format == 'csv':
+        df.to_csv(filepath, sep=',')
+    elif format == 'feather':
+        df.reset_index(drop=True).to_feather(filepath)
+    elif format == 'parquet':
+        df.to_parquet(filepath, index=False)
+    elif format == 'npz':
+        arrays = {'__columns__': np.array([str(column) for column in df.columns])}
+        for index, column in enumerate(df.columns):
+            values = df[column]
+            if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+                arrays['column_%d' % index] = values.to_numpy()
+            else:
+                #the strings are repeated a lot, so they are registered once with the index of each value
+                codes, uniques = pd.factorize(values)
+                arrays['column_%d' % index] = np.array([str(value) for value in uniques])
+                arrays['codes_%d' % index] = codes.astype(np.int32)
+        #with a file object np.savez does not add the .npz extension to other names
+        with open(filepath, 'wb') as npz_file:
+            np.savez(npz_file, **arrays)
+    else:
+        raise ParseError('The format must be one of %s, not %r' % (SAVE_FORMATS, format))
+
+def _parse_xml(filepath, duration, streaming):
+    """return the Dataframe of the musicxml file, see xml_to_csv
+
+    The stages recorded by the profilers are 'parser.read_xml' (unzip and read the xml tree,
+    when the file is streamed it is read while the rows are made), 'parser.rows' and 'parser.correct'.
+    """
+    if streaming:
+        parts = _stream_parts(filepath)
+    else:
+        with stage('parser.read_xml'):
+            try:
+                parsed = MusicXMLDocument(filepath)
+            except:
+                raise ParseError('There is a problem with the path to the xml/mxl file or the files are not standard.')
+        parts = ((part, part.measures) for part in parsed.parts)
+
+    with stage('parser.rows') as record:
+        df = _get_rows(filepath, parts, streaming)
+        record.rows = df.shape[0]
+    
+    # correct the onset to be quantized by the measure number
+    # add the 'onset_seconds' column from the new onset, for the dynamic plotting
+    with stage('parser.correct'):
+        df = data_onset_duration_corrector(df, duration)
+
+    return df
+
+def _get_rows(filepath, parts, streaming):
+    """return the Dataframe of the notes of the parts, before their onsets are corrected"""
     columns = ['filepath', # piece ID or something (TODO)
                'qpm', #add qpm, the beat per minute
                'time_sign_num', #add the time signature numerator
@@ -53,16 +301,13 @@ def xml_to_csv(filepath=os.path.dirname(os.path.realpath(__file__))+'\\'+'data'+
     time_signature_on = False
     qpm_on = False
     
-    try:
-        parsed = MusicXMLDocument(filepath)
-    except:
-        raise ParseError('There is a problem with the path to the xml/mxl file or the files are not standard.')
-    
-    df = pd.DataFrame(columns=columns)
+    #one buffer per column, the DataFrame is built once at the end
+    #(appending the rows one by one copies the whole DataFrame for every note)
+    buffers = {column: [] for column in columns}
 
-    for part in parsed.parts:
+    for part, measures in parts:
         measure_no = 0
-        for measure in part.measures:
+        for measure in measures:
             measure_no += 1
             
             #keep the previous key signature
@@ -100,7 +345,8 @@ def xml_to_csv(filepath=os.path.dirname(os.path.realpath(__file__))+'\\'+'data'+
                     ntype = 'note'
                 if note.pitch is not None:
                     note_name = note.pitch[0]
-                    tpc = note_name[:-1]
+                    #the double sharps are written x in MusicXML and ## in tpc
+                    tpc = note_name[:-1].replace('x', '##')
                     pitch = int(note.pitch[1])
                     pitch_class = int(note.pitch[1] % 12)
                     step = note_name[0]
@@ -145,33 +391,163 @@ def xml_to_csv(filepath=os.path.dirname(os.path.realpath(__file__))+'\\'+'data'+
                           pitch_class,
                           duration,
                           onset]
-                row = dict(zip(columns, values))
-                df = df.append(row, ignore_index=True)
+                for column, value in zip(columns, values):
+                    buffers[column].append(value)
+
+    #the state of the parser is shared by all the measures so, once the whole
+    #document is parsed, measure.state.qpm is the last tempo of the score
+    #give the same values when the measures are read while the file is streamed
+    if streaming and buffers['qpm']:
+        buffers['qpm'] = [measure.state.qpm]*len(buffers['qpm'])
+
+    return pd.DataFrame(buffers, columns=columns)
+
+def _stream_parts(filepath):
+    """yield (part, measures) of the xml/mxl file, the measures being parsed while they are iterated"""
+    measures = _stream_measures(filepath)
+    for part, part_measures in groupby(measures, key=itemgetter(0)):
+        yield (part, (measure for _, measure in part_measures))
+
+def _stream_measures(filepath):
+    """yield (part, measure) of the xml/mxl file read with MusicXMLStream"""
+    try:
+        for part, measure in MusicXMLStream(filepath).iter_measures():
+            yield (part, measure)
+    except Exception:
+        raise ParseError('There is a problem with the path to the xml/mxl file or the files are not standard.')
+
+def parse_corpus(paths, workers=None, duration='whole_note', ordered=True):
+    """parse many xml/mxl files in a pool of processes, yield (filepath, DataFrame) for each file
     
-    # correct the onset to be quantized by the measure number
-    # add the 'onset_seconds' column from the new onset, for the dynamic plotting
-    df = data_onset_duration_corrector(df, duration)
+    A file that cannot be parsed does not stop the run, its DataFrame is replaced
+    by the ParseError that was raised, e.g. (filepath, ParseError(...)).
     
-    if save_csv:
-        #  path to the csv directory
-        csv_path = os.path.dirname(sys.argv[0])+r'/csv'
-        # get the name from the xml file and put in csv dir
-        if pd.isnull(filename):
-            if not os.path.exists(csv_path):
-                os.makedirs(csv_path)
-            filename = os.path.basename(filepath).split('.')[0] + '.csv'
-            df.to_csv(os.path.join(csv_path,filename), sep=',')
-        # if filename is a path, register the csv file at the given path
-        elif "\\" in filename or "/" in filename:
-            df.to_csv(filename, sep=',')
-        # get the name and put it in csv folder
+    Keyword arguments:
+    paths -- a glob pattern (e.g. 'corpus/**/*.mxl') or a list of paths to the xml/mxl files
+    workers -- the number of processes, by default one per core, 1 parse in the current process
+    duration -- define of the duration will be in seconds or relative to a whole note
+                (possible values: 'seconds' or 'whole_note'(default value))
+    ordered -- if True the files are yielded in the order of paths,
+               if False they are yielded as soon as they are parsed
+    """
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(paths, recursive=True))
+    else:
+        paths = list(paths)
+    
+    if workers == 1:
+        for filepath in paths:
+            yield (filepath, _parse_corpus_file(filepath, duration))
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if ordered:
+            # send the files by chunks so each process does not wait for every single file
+            chunksize = max(1, len(paths)//(4*(workers or os.cpu_count() or 1)))
+            results = executor.map(_parse_corpus_file, paths, [duration]*len(paths), chunksize=chunksize)
+            for filepath, result in zip(paths, results):
+                yield (filepath, result)
         else:
-            # check if the csv folder already exist if not create one
-            if not os.path.exists(csv_path):
-                os.makedirs(csv_path)
-            df.to_csv(os.path.join(csv_path,filename), sep=',')
+            futures = {executor.submit(_parse_corpus_file, filepath, duration): filepath for filepath in paths}
+            for future in as_completed(futures):
+                yield (futures[future], future.result())
 
-    return df
+def corpus_to_csv(paths, filename, workers=None, duration='whole_note'):
+    """parse many xml/mxl files and register all of them in one csv file, return the errors
+    
+    The pieces are written in the order of paths as soon as they are parsed,
+    the column 'filepath' tells from which file each row comes.
+    
+    Keyword arguments:
+    paths -- a glob pattern (e.g. 'corpus/**/*.mxl') or a list of paths to the xml/mxl files
+    filename -- the path of the .csv file
+    workers -- the number of processes, by default one per core
+    duration -- define of the duration will be in seconds or relative to a whole note
+                (possible values: 'seconds' or 'whole_note'(default value))
+    return:
+    errors -- dictionary filepath: ParseError of the files that could not be parsed
+    """
+    errors = {}
+    header = True
+    with open(filename, 'w', newline='') as csv_file:
+        for filepath, result in parse_corpus(paths, workers=workers, duration=duration):
+            if isinstance(result, ParseError):
+                errors[filepath] = result
+            else:
+                result.to_csv(csv_file, sep=',', header=header, index=False)
+                header = False
+    return errors
+
+def corpus_to_store(paths, filename, workers=None, duration='whole_note'):
+    """parse many xml/mxl files and register their notes in one corpus store, return the errors
+
+    The store is a .npy file with the structured array (STORE_DTYPE) of the notes of all the pieces,
+    the rests are not kept, and an index filename_index.npz with the path of each piece and the
+    position of its first note. It is read with reader.CorpusStore, which memory-maps the file
+    so a piece is read without reading or parsing the others.
+
+    Keyword arguments:
+    paths -- a glob pattern (e.g. 'corpus/**/*.mxl') or a list of paths to the xml/mxl files
+    filename -- the path of the .npy file
+    workers -- the number of processes, by default one per core
+    duration -- define of the duration will be in seconds or relative to a whole note
+                (possible values: 'seconds' or 'whole_note'(default value))
+    return:
+    errors -- dictionary filepath: ParseError of the files that could not be parsed
+    """
+    errors = {}
+    names = []
+    offsets = [0]
+    #the number of notes is only known at the end, so the notes are written after the header later
+    notes_filename = filename + '.tmp'
+    with open(notes_filename, 'wb') as notes_file:
+        for filepath, result in parse_corpus(paths, workers=workers, duration=duration):
+            if isinstance(result, ParseError):
+                errors[filepath] = result
+                continue
+            try:
+                notes = get_store_notes(result)
+            except Exception as error:
+                errors[filepath] = ParseError('%s: %s' % (type(error).__name__, error))
+                continue
+            notes_file.write(notes.tobytes())
+            names.append(filepath)
+            offsets.append(offsets[-1] + notes.shape[0])
+
+    header = {'descr': np.lib.format.dtype_to_descr(STORE_DTYPE), 'fortran_order': False, 'shape': (offsets[-1],)}
+    with open(filename, 'wb') as store_file:
+        np.lib.format.write_array_header_2_0(store_file, header)
+        with open(notes_filename, 'rb') as notes_file:
+            shutil.copyfileobj(notes_file, store_file)
+    os.remove(notes_filename)
+    np.savez(get_store_index_path(filename), names=np.array(names, dtype=str), offsets=np.array(offsets, dtype=np.int64))
+    return errors
+
+def get_store_notes(df):
+    """return the structured array (STORE_DTYPE) of the notes of the DataFrame of a piece, without the rests"""
+    if 'type' in df.columns:
+        df = df[df['type'] != 'rest']
+    df = df[df['tpc'].notnull()]
+    pc = df['pitch_class'] if 'pitch_class' in df.columns else df['pc']
+    notes = np.empty(df.shape[0], dtype=STORE_DTYPE)
+    notes['fifth'] = get_fifth_nb_array(df['tpc'])
+    notes['pc'] = pc.to_numpy()
+    for field in ['pitch', 'duration', 'onset', 'onset_seconds', 'measure_no', 'qpm']:
+        notes[field] = df[field].to_numpy()
+    return notes
+
+def get_store_index_path(filename):
+    """return the path of the index of a corpus store"""
+    return os.path.splitext(filename)[0] + '_index.npz'
+
+def _parse_corpus_file(filepath, duration):
+    """return the DataFrame of one file of the corpus, or the ParseError if it cannot be parsed"""
+    try:
+        return xml_to_csv(filepath, save_csv=False, duration=duration)
+    except ParseError as error:
+        return error
+    except Exception as error:
+        return ParseError('%s: %s' % (type(error).__name__, error))
 
 def data_onset_duration_corrector(data, duration):
     """
@@ -190,58 +566,53 @@ def data_onset_duration_corrector(data, duration):
     #they are more likely falsely parsed notes from musicxml_parser
     corr_data.drop(corr_data[corr_data.duration == 0].index, inplace=True)
     
-    min_onset = 0
-    max_onset = 0
-    onset_ratio = 0
-    duration_ratio = 0
-    current_minimum_time = 0
-    time_ratio = 0
+    #keep the measures from 1 in order, and the notes in their order inside of a measure
+    corr_data = corr_data[corr_data['measure_no'] >= 1]
+    corr_data = corr_data.sort_values('measure_no', kind='stable')
     
-    #get rid of all the notes that have a zero duration
-    corr_data.drop(corr_data[corr_data.duration == 0].index, inplace=True)
+    #one row per measure with the values of its first note
+    df_measure = corr_data.drop_duplicates('measure_no').set_index('measure_no')
+    gb_measure_no = corr_data.groupby('measure_no', sort=True)
     
-    #group the notes by measure 
-    gb_mesure_no = corr_data.groupby('measure_no')
+    #it is assumed that the first note of the measure begins at the start of the measure
+    #the next measure begins with its first note
+    min_onset = gb_measure_no['onset'].min().values
+    onset_ratio = np.zeros(min_onset.shape[0])
+    onset_ratio[:-1] = 1/(min_onset[1:]-min_onset[:-1])
+    #assume that the onset_ratio is the same for the last and before last measure
+    if onset_ratio.shape[0] > 1:
+        onset_ratio[-1] = onset_ratio[-2]
     
-    ret_data = pd.DataFrame()
+    #the time signature is the same for the whole measure
+    duration_ratio = df_measure['time_sign_den'].values/df_measure['time_sign_num'].values
+    qpm = df_measure['qpm'].values
     
-    for i in range(corr_data['measure_no'].max()):
-        df_group = gb_mesure_no.get_group(i+1).copy()
-        
-        #assume that the onset_ratio is the same for the last and before last measure
-        if i != corr_data['measure_no'].max() - 1:
-            df_group_next = gb_mesure_no.get_group(i+1+1)
-            
-            #it is assumed that the first note of the measure begins at the start of the measure
-            min_onset = df_group['onset'].min()
-            max_onset = df_group_next['onset'].min()
-            onset_ratio = 1/(max_onset-min_onset)
-        
-        #set the onset like the first note start at the at the start of the onset
-        df_group['onset'] *= onset_ratio
-        df_group['onset'] += (i - df_group['onset'].min())
-        
-        #the time signature is the same for the whole measure
-        duration_ratio = df_group['time_sign_den'].iloc[0]/df_group['time_sign_num'].iloc[0]
-        
-        # if True change the duration to be in seconds using the BPM value
-        if duration =='seconds':
-            #so the duration is equal to the number of seconds of the quatized note
-            df_group['duration'] *= (4*60)/df_group['qpm'].iloc[0]
-        
-        #the ratio between the time in second when the note is played and the measure relative timing
-        time_ratio = (4 * 60)/(duration_ratio * df_group['qpm'].iloc[0])
-        
-        #the adding of the time column using the onset column as base
-        df_group = df_group.assign(onset_seconds=df_group['onset'].values)
-        df_group['onset_seconds'] += -i
-        df_group['onset_seconds'] *= time_ratio
-        df_group['onset_seconds'] += current_minimum_time
-        
-        #the calculation of the time in second when the next measure begins
-        current_minimum_time = current_minimum_time + time_ratio
-        
-        #add the group to the note sequence
-        ret_data = pd.concat([ret_data, df_group])
+    #the ratio between the time in second when the note is played and the measure relative timing
+    time_ratio = (4 * 60)/(duration_ratio * qpm)
+    
+    #the time in second when each measure begins
+    current_minimum_time = np.zeros(time_ratio.shape[0])
+    current_minimum_time[1:] = np.cumsum(time_ratio)[:-1]
+    
+    #spread the values of the measures on their notes
+    row_measure = gb_measure_no.ngroup().values
+    i = (df_measure.index.values - 1)[row_measure]
+    
+    #set the onset like the first note start at the at the start of the onset
+    onset = corr_data['onset'].values * onset_ratio[row_measure]
+    onset_min = pd.Series(onset).groupby(row_measure).transform('min').values
+    onset += (i - onset_min)
+    corr_data['onset'] = onset
+    
+    # if True change the duration to be in seconds using the BPM value
+    if duration =='seconds':
+        #so the duration is equal to the number of seconds of the quatized note
+        corr_data['duration'] *= ((4*60)/qpm)[row_measure]
+    
+    #the adding of the time column using the onset column as base
+    onset_seconds = onset + -i
+    onset_seconds *= time_ratio[row_measure]
+    onset_seconds += current_minimum_time[row_measure]
+    ret_data = corr_data.assign(onset_seconds=onset_seconds)
         
-    return ret_data
\ No newline at end of file
+    return ret_data
@@ -0,0 +1,163 @@
+"""
+record the time, the number of rows and the memory of the stages of the parser, the readers and the plots
+"""
+import time
+import functools
+import threading
+import tracemalloc
+
+import pandas as pd
+
+#the profilers active in each thread, see Profiler
+_local = threading.local()
+
+class Profiler(object):
+    """Context manager that records the stages run by pitchplots in its block, in the current thread.
+
+    Each stage gives a record {'stage', 'seconds', 'rows', 'peak_bytes'}: its name (e.g. 'parser.rows'),
+    its duration, the number of rows it made (None if it does not make a table) and, if memory is True,
+    the peak of the memory allocated during the stage (measured with tracemalloc, which slows the run down).
+    The stages can be nested, e.g. 'reader.read' is a part of 'reader.get_df_short'.
+
+        with Profiler() as profiler:
+            tonnetz('piece.mxl')
+        profiler.to_dataframe()
+
+    Keyword arguments:
+    memory -- if True the peak of the memory of each stage is recorded
+    callback -- a function called with the record of each stage when it ends
+    """
+
+    def __init__(self, memory=False, callback=None):
+        self.memory = memory
+        self.callback = callback
+        self.records = []
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        _get_profilers().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _get_profilers().remove(self)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        return False
+
+    def add_record(self, record):
+        """register the record of a stage and send it to the callback"""
+        self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def to_dataframe(self):
+        """return the records in a DataFrame with the columns stage, seconds, rows and peak_bytes"""
+        return pd.DataFrame(self.records, columns=['stage', 'seconds', 'rows', 'peak_bytes'])
+
+    def summary(self):
+        """return the total seconds, the number of calls and the biggest peak of memory of each stage"""
+        df = self.to_dataframe()
+        return df.groupby('stage').agg(seconds=('seconds', 'sum'), calls=('seconds', 'size'),
+                                       peak_bytes=('peak_bytes', 'max'))
+
+class _Stage(object):
+    """a stage recorded by the active profilers, see stage"""
+
+    def __init__(self, name, profilers):
+        self.name = name
+        self.rows = None
+        self._profilers = list(profilers)
+        self._memory = any(profiler.memory for profiler in self._profilers) and tracemalloc.is_tracing()
+
+    def __enter__(self):
+        stages = _get_stages()
+        self._parent = stages[-1] if stages else None
+        stages.append(self)
+        if self._memory:
+            #the peak is reset for this stage, the parent keeps the peak it reached before
+            current, peak = tracemalloc.get_traced_memory()
+            if self._parent is not None and self._parent._memory:
+                self._parent._peak = max(self._parent._peak, peak)
+            tracemalloc.reset_peak()
+            self._start_bytes = current
+            self._peak = current
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self._start
+        _get_stages().pop()
+        peak_bytes = None
+        if self._memory and tracemalloc.is_tracing():
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            peak_bytes = self._peak - self._start_bytes
+            if self._parent is not None and self._parent._memory:
+                self._parent._peak = max(self._parent._peak, self._peak)
+        record = {'stage': self.name, 'seconds': seconds, 'rows': self.rows, 'peak_bytes': peak_bytes}
+        for profiler in self._profilers:
+            profiler.add_record(record)
+        return False
+
+class _NoStage(object):
+    """the stage given when no profiler is active, it does nothing
+
+    It is shared by all the calls, so it keeps no attribute: the rows set on it are ignored.
+    """
+    __slots__ = ()
+
+    @property
+    def rows(self):
+        return None
+
+    @rows.setter
+    def rows(self, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_no_stage = _NoStage()
+
+def stage(name):
+    """return a context manager that records a stage in the active profilers of the thread
+
+    Set the attribute rows of the object it returns to record the number of rows of the stage.
+    When no profiler is active it returns a shared object that does nothing.
+    """
+    profilers = getattr(_local, 'profilers', None)
+    if not profilers:
+        return _no_stage
+    return _Stage(name, profilers)
+
+def _get_profilers():
+    """return the list of the active profilers of the thread"""
+    if not hasattr(_local, 'profilers'):
+        _local.profilers = []
+    return _local.profilers
+
+def _get_stages():
+    """return the list of the stages being run in the thread, the last one is the innermost"""
+    if not hasattr(_local, 'stages'):
+        _local.stages = []
+    return _local.stages
+
+def profiled(name):
+    """decorator that records each call of the function as a stage, with the rows of the DataFrame it returns"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name) as record:
+                result = function(*args, **kwargs)
+                #the functions that return a table give its number of rows
+                if record is not _no_stage and isinstance(result, pd.DataFrame):
+                    record.rows = result.shape[0]
+                return result
+        return wrapper
+    return decorator
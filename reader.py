@@ -3,14 +3,128 @@ module that has to read what is given to the plotting functions
 """
 import os
 
-from pitchplots.functions import get_acc, get_step, get_pc, sampling
+import numpy as np
+
+from pitchplots.audio import mix_soundtrack
+from pitchplots.parser import xml_to_csv, get_store_index_path
+from pitchplots.profiling import stage, profiled
+from pitchplots.functions import get_acc_array, get_step_array, get_pc_array, get_fifth_note_array, sampling_array, sampling_frames
 
 import pandas as pd
-import moviepy.editor as mpe
+#moviepy is only imported when a soundtrack is rendered, it takes long to import
 #from midiutil import MIDIFile
 #import librosa
 #import numpy
 
+class CorpusStore(object):
+    """Corpus of pieces registered by parser.corpus_to_store.
+
+    The notes of all the pieces are memory-mapped from the .npy file, so opening a piece only reads
+    its own notes. A piece is given to the plotting functions and to read_piece as (store, piece_id),
+    where piece_id is its position in the store or the path of its xml/mxl file.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.notes = np.load(filename, mmap_mode='r')
+        with np.load(get_store_index_path(filename)) as index:
+            self.names = [str(name) for name in index['names']]
+            self.offsets = index['offsets']
+        self._positions = {name: position for position, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __reduce__(self):
+        #the processes of a pool open the file again instead of receiving a copy of the notes
+        return (CorpusStore, (self.filename,))
+
+    def get_notes(self, piece_id):
+        """return the structured array of the notes of a piece, a slice of the memory-mapped file"""
+        position = self._positions[piece_id] if isinstance(piece_id, str) else piece_id
+        return self.notes[self.offsets[position]:self.offsets[position + 1]]
+
+    def get_df(self, piece_id, columns=None):
+        """return the DataFrame of a piece with the columns of xml_to_csv that the store has
+
+        The columns are tpc, pitch_class, pitch, duration, onset, onset_seconds, measure_no and qpm,
+        if columns is given only these ones are built.
+        """
+        notes = self.get_notes(piece_id)
+        data = {}
+        for column in ['tpc', 'pitch_class', 'pitch', 'duration', 'onset', 'onset_seconds', 'measure_no', 'qpm']:
+            if columns is not None and column not in columns:
+                continue
+            if column == 'tpc':
+                data[column] = get_fifth_note_array(notes['fifth'])
+            else:
+                values = notes['pc' if column == 'pitch_class' else column]
+                #the small integers of the store would overflow in the computations
+                data[column] = values.astype(np.int64) if values.dtype.kind == 'i' else values
+        return pd.DataFrame(data)
+
+#the columns of the pieces used by get_df_short
+SHORT_COLUMNS = ['tpc', 'pc', 'pitch_class', 'duration', 'measure_no']
+
+@profiled('reader.read')
+def read_piece(piece, columns=None):
+    """return a copy of the DataFrame of a piece
+
+    Keyword arguments:
+    piece -- a DataFrame, the path to a .csv, .feather, .parquet or .npz file containing the data
+        (see parser.save_dataframe), or to a .mxl/.xml file that is parsed with xml_to_csv
+        (and read from the parse cache if one is set, see parser.set_parse_cache),
+        or (store, piece_id) for a piece of a CorpusStore
+    columns -- if given only these columns are read, the ones that the piece does not have are ignored,
+        the other columns of the .feather, .parquet and .npz files are not read at all
+    """
+    if isinstance(piece, pd.DataFrame):
+        if columns is None:
+            return piece.copy()
+        return piece[[column for column in piece.columns if column in columns]].copy()
+    if isinstance(piece, tuple):
+        store, piece_id = piece
+        return store.get_df(piece_id, columns)
+
+    extension = os.path.splitext(piece)[1].lower()
+    if extension in ('.mxl', '.xml'):
+        df_data = xml_to_csv(piece, save_csv=False)
+        if columns is None:
+            return df_data
+        return df_data[[column for column in df_data.columns if column in columns]]
+    if extension == '.npz':
+        return _read_npz(piece, columns)
+    if extension == '.feather':
+        if columns is not None:
+            import pyarrow.ipc
+            with pyarrow.ipc.open_file(piece) as feather_file:
+                columns = [column for column in feather_file.schema.names if column in columns]
+        return pd.read_feather(piece, columns=columns)
+    if extension == '.parquet':
+        if columns is not None:
+            import pyarrow.parquet
+            columns = [column for column in pyarrow.parquet.read_schema(piece).names if column in columns]
+        return pd.read_parquet(piece, columns=columns)
+    if columns is None:
+        return pd.read_csv(piece)
+    return pd.read_csv(piece, usecols=lambda column: column in columns)
+
+def _read_npz(filepath, columns):
+    """return the DataFrame of a .npz file registered by parser.save_dataframe, see read_piece"""
+    #the arrays of a .npz file are only read when they are accessed
+    with np.load(filepath) as npz_file:
+        data = {}
+        for index, column in enumerate(npz_file['__columns__']):
+            if columns is not None and column not in columns:
+                continue
+            values = npz_file['column_%d' % index]
+            if 'codes_%d' % index in npz_file:
+                #the code -1 of the missing values gives the None put at the end, even if there are no other values
+                values = np.append(values.astype(object), None)[npz_file['codes_%d' % index]]
+            data[str(column)] = values
+    return pd.DataFrame(data)
+
+@profiled('reader.get_df_short')
 def get_df_short(
     piece,
     vocabulary={0:'C', 1:'Db', 2:'D', 3:'Eb', 4:'E', 5:'F', 6:'Gb', 7:'G', 8:'Ab', 9:'A', 10:'Bb', 11:'B'},
@@ -24,7 +138,7 @@ def get_df_short(
         pitch class value('pc'), number of appearences('nb'), total duration of the note('duration'),
         tpc format note('tpc'), sharps and flats('acc')
     Keyword arguments:
-    piece -- the absolute path to the .csv file containing the data
+    piece -- the absolute path to the .csv (or .mxl/.xml) file containing the data, a DataFrame or (store, piece_id)
     vocabulary -- the conversion table from pitch class to tpc(F#, A, ...) format,
         the position indicate the pitch class value (default [C, Db, D, Eb, E, F, Gb, G, Ab, A, Bb, B])
     pitch_type -- the type of data that contains the file (default 'tpc')
@@ -32,11 +146,8 @@ def get_df_short(
     duration -- tell him if he has to class the notes by their total duration or their number of appearance
     measures -- give a set of measures example [5, 18], will display the notes of the measures 5 to 18 included
     """ 
-    #check if it is a path to .csv or a DataFrame
-    if isinstance(piece, pd.DataFrame):
-        df_data = piece.copy()
-    else:
-        df_data =  pd.read_csv(piece)
+    #check if it is a path to .csv or a DataFrame, only the columns used here are read
+    df_data = read_piece(piece, columns=SHORT_COLUMNS)
     
     #the column with the pc values is called pitch_class so it rename it to 'pc'
     if 'pitch_class' in df_data.columns:
@@ -61,12 +172,12 @@ def get_df_short(
                 df_tpc.sort_values('duration', inplace=True, ascending=False)
             
         #get the pc values from tpc
-        df_tpc['pc'] = df_tpc['tpc'].apply(get_pc)
+        df_tpc['pc'] = get_pc_array(df_tpc['tpc'])
         
         #add the sup column
-        df_tpc['acc'] = df_tpc['tpc'].apply(get_acc)
+        df_tpc['acc'] = get_acc_array(df_tpc['tpc'])
         
-        df_tpc['step'] = df_tpc['tpc'].apply(get_step)
+        df_tpc['step'] = get_step_array(df_tpc['tpc'])
         
         return df_tpc
     
@@ -86,20 +197,17 @@ def get_df_short(
                 df_pc.sort_values('duration', inplace=True, ascending=False)
             
         #add the tpc column
-        s_tpc_pc = []
-        for i in range(df_pc.shape[0]):
-            s_tpc_pc.append(vocabulary[int(df_pc.at[i, 'pc'])])
-
-        df_pc['tpc'] = pd.Series(s_tpc_pc)
+        df_pc['tpc'] = df_pc['pc'].astype(int).map(vocabulary)
 
         #add the sup column
-        df_pc['acc'] = df_pc['tpc'].apply(get_acc)
+        df_pc['acc'] = get_acc_array(df_pc['tpc'])
 
         #keep only the step from tpc
-        df_pc['step'] = df_pc['tpc'].apply(get_step)
+        df_pc['step'] = get_step_array(df_pc['tpc'])
 
         return df_pc
     
+@profiled('reader.get_df_long')
 def get_df_long(
         piece,
         vocabulary={0:'C', 1:'Db', 2:'D', 3:'Eb', 4:'E', 5:'F', 6:'Gb', 7:'G', 8:'Ab', 9:'A', 10:'Bb', 11:'B'},
@@ -107,11 +215,12 @@ def get_df_long(
         measures=None,
         sampling_frequency=50,
         speed_ratio=1,
-        audio=False):
+        audio=False,
+        frames=False):
     """get the whole columns 
     need a column 'onset_seconds' that is the onset but in seconds
     Keyword arguments:
-    piece -- the absolute path to the .csv file containing the data
+    piece -- the absolute path to the .csv (or .mxl/.xml) file containing the data, a DataFrame or (store, piece_id)
     vocabulary -- the conversion table from pitch class to tpc(F#, A, ...) format,
         the position indicate the pitch class value (default [C, Db, D, Eb, E, F, Gb, G, Ab, A, Bb, B])
     pitch_type -- the type of data that contains the file (default 'tpc')
@@ -120,11 +229,10 @@ def get_df_long(
     sampling_frequency -- the frequency of lecture of the piece, also correspond to the fps of the video
     speed_ratio -- set the speed at which the video is read, for example : 2 accelerate the speed of the video by 2
     audio -- if True render the soundtrack for the animation
+    frames -- if True add the columns 'frame' and 'frame_end', the frame where each note
+        starts and the first frame after its end, see get_frame_index
     """ 
-    if isinstance(piece, pd.DataFrame):
-        df_data = piece.copy()
-    else:
-        df_data =  pd.read_csv(piece)
+    df_data = read_piece(piece)
     
     #the column with the pc values is called pitch_class so it rename it to 'pc'
     if 'pitch_class' in df_data.columns:
@@ -140,16 +248,16 @@ def get_df_long(
     
     if 'tpc' in df_data.columns and pitch_type=='tpc':
         if 'acc' not in df_data.columns:
-            df_data['acc'] = df_data['tpc'].apply(get_acc)
+            df_data['acc'] = get_acc_array(df_data['tpc'])
         if 'step' not in df_data.columns:
-            df_data['step'] = df_data['tpc'].apply(get_step)
+            df_data['step'] = get_step_array(df_data['tpc'])
     if 'pc' in df_data.columns and pitch_type=='pc':
         if 'tpc' not in df_data.columns:
-            df_data['tpc'] = df_data.replace({"pc":vocabulary})
+            df_data['tpc'] = df_data['pc'].map(vocabulary)
         if 'acc' not in df_data.columns:
-            df_data['acc'] = df_data['tpc'].apply(get_acc)
+            df_data['acc'] = get_acc_array(df_data['tpc'])
         if 'step' not in df_data.columns:
-            df_data['step'] = df_data['tpc'].apply(get_step)
+            df_data['step'] = get_step_array(df_data['tpc'])
     
     #the animation functions do not need the rests
     if 'type' in df_data.columns:
@@ -161,23 +269,28 @@ def get_df_long(
     
     ###AUDIO
     if audio:
-        sound_path = os.path.dirname(os.path.realpath(__file__))+'\\'+'data'+'\\'
-        soundtrack = mpe.AudioFileClip(sound_path+'silence.wav')
         print('Rendering the soundtrack')
-        for i in range(df_data.shape[0]):
-            note_sound = mpe.AudioFileClip(sound_path+'midi'+str(int(df_data.at[i, 'pitch']))+'.wav')
-            #NOTE TO EXPLAIN THAT
-            if df_data.at[i, 'duration']*4*60/df_data.at[i, 'qpm'] < 4:
-                note_sound = note_sound.set_duration(df_data.at[i, 'duration']*4*60/df_data.at[i, 'qpm'])
-            else:
-                note_sound = note_sound.set_duration(4)
-            note_sound = note_sound.set_start(df_data.at[i, 'onset_seconds'])
-            soundtrack = mpe.CompositeAudioClip([soundtrack, note_sound])
+        #the sounds of the notes are mixed in one array, played at most 4 seconds
+        with stage('reader.soundtrack'):
+            samples, fps = mix_soundtrack(
+                df_data['pitch'],
+                df_data['onset_seconds'],
+                df_data['duration']*4*60/df_data['qpm'])
+        from moviepy.audio.AudioClip import AudioArrayClip
+        soundtrack = AudioArrayClip(samples, fps=fps)
         print('The soundtrack is done')
         
 #    soundtrack.write_audiofile("test1.wav", fps=44100)
     
-    df_data['onset_seconds'] = df_data['onset_seconds'].apply(sampling, sampling_frequency=sampling_frequency)
+    if frames:
+        #the duration in seconds is computed like for the soundtrack
+        duration_seconds = df_data['duration']*4*60/df_data['qpm']/speed_ratio
+        df_data['frame'] = sampling_frames(df_data['onset_seconds'], sampling_frequency)
+        df_data['frame_end'] = sampling_frames(df_data['onset_seconds'] + duration_seconds, sampling_frequency)
+        #a note lasts at least one frame
+        df_data['frame_end'] = np.maximum(df_data['frame_end'], df_data['frame'] + 1)
+    
+    df_data['onset_seconds'] = sampling_array(df_data['onset_seconds'], sampling_frequency)
     
 #    if midi:
 #        midi_track    = 0
@@ -203,3 +316,21 @@ def get_df_long(
         return (df_data, soundtrack)
     else:
         return df_data
+
+def get_frame_index(df_data):
+    """return (first_row, last_row), for each frame the range of rows of df_data that can be played
+
+    The notes played at the frame f are in df_data.iloc[first_row[f]:last_row[f]],
+    they are the ones of this range that have df_data['frame_end'] > f,
+    so the notes of a frame are found without reading the whole DataFrame.
+    Keyword arguments:
+    df_data -- the DataFrame returned by get_df_long with frames=True (sorted by onset)
+    """
+    frame = df_data['frame'].values
+    frame_end = df_data['frame_end'].values
+    nb_frames = frame_end.max() if frame_end.shape[0] > 0 else 0
+    s_frames = np.arange(nb_frames)
+    #the rows before first_row have all ended, the rows from last_row have not started
+    first_row = np.searchsorted(np.maximum.accumulate(frame_end), s_frames, side='right')
+    last_row = np.searchsorted(frame, s_frames, side='right')
+    return (first_row, last_row)
@@ -1,16 +1,26 @@
 """
 Functions for none moving charts
 """
+import io
 import math
+from functools import lru_cache
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
 import matplotlib
+import matplotlib.colorbar
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.collections import PolyCollection, PathCollection
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
 
 from pitchplots.reader import get_df_short
-from pitchplots.functions import get_acc, get_step, get_pc, get_dic_nei, put_flat_sharp, get_fifth_nb, get_fifth_note, is_tpc, is_pc
+from pitchplots.profiling import profiled
+from pitchplots.functions import get_acc, get_step, get_pc, put_flat_sharp, is_tpc, is_pc
+from pitchplots.functions import get_acc_array, get_step_array, get_pc_array, put_flat_sharp_array
+from pitchplots.functions import get_fifth_nb_array, get_fifth_note_array, get_hex_layout
 
 class StaticError(Exception):
     """Exception thrown when the static module cannot plot."""
@@ -28,6 +38,74 @@ class InvalidConvertTableTypeError(StaticError):
     """Exception thrown when vocabulary does not have 12 elements or its elements are not tpc notes"""
     pass
 
+def _get_df_short(piece, vocabulary, pitch_type, measures, duration):
+    """return the DataFrame of get_df_short for a piece, or for a dict or a Series of the values of the notes
+
+    The notes of a dict or a Series are tpc or pc like pitch_type, their values are put in 'nb' and in 'duration'.
+    """
+    if not isinstance(piece, (dict, pd.Series)):
+        return get_df_short(piece, vocabulary=vocabulary, pitch_type=pitch_type, measures=measures, duration=duration)
+
+    s_values = pd.Series(piece, dtype=float).sort_values(ascending=False)
+    if pitch_type == 'pc':
+        df_data = pd.DataFrame({'pc':s_values.index.astype(int), 'nb':s_values.values, 'duration':s_values.values})
+        df_data['tpc'] = df_data['pc'].map(vocabulary)
+    else:
+        df_data = pd.DataFrame({'tpc':s_values.index, 'nb':s_values.values, 'duration':s_values.values})
+        df_data['pc'] = get_pc_array(df_data['tpc'])
+    df_data['acc'] = get_acc_array(df_data['tpc'])
+    df_data['step'] = get_step_array(df_data['tpc'])
+    return df_data
+
+def _new_figure(figsize, show):
+    """return a new figure, it is a pyplot figure only if it is shown
+
+    The figures that are not shown have their own Agg canvas and do not use the state of pyplot,
+    so they can be created and drawn in different threads.
+    """
+    if show:
+        #pyplot is only imported for the figures that are shown, it takes long to import
+        import matplotlib.pyplot as plt
+        return plt.figure(figsize=figsize)
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+def _get_cmap(cmap):
+    """return the matplotlib Colormap of a name or of a Colormap"""
+    if isinstance(cmap, matplotlib.colors.Colormap):
+        return cmap
+    if hasattr(matplotlib, 'colormaps'):
+        return matplotlib.colormaps[cmap]
+    #before matplotlib 3.5
+    return matplotlib.cm.get_cmap(cmap)
+
+@profiled('static.draw')
+def get_figure_bytes(fig, format='png', **kwargs):
+    """return the image of a figure in bytes, without writing a file
+
+    Keyword arguments:
+    fig -- the figure, for example returned by tonnetz, circle or line
+    format -- the format of the image, 'png', 'svg' or another format of matplotlib.figure.Figure.savefig
+    **kwargs -- these arguments are redirected to matplotlib.figure.Figure.savefig, like dpi
+    """
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=format, **kwargs)
+    return buffer.getvalue()
+
+def _get_norm(values, log):
+    """return the normalization of the values for the colors, on a log scale if log is True"""
+    if log:
+        return matplotlib.colors.LogNorm(vmin=values.min(), vmax=values.max())
+    return matplotlib.colors.Normalize(vmin=0, vmax=values.max())
+
+def _set_colorbar_norm(colorbar, norm):
+    """put the norm in the colorbar if there is one, it is redrawn only if the scale changes"""
+    if colorbar is None:
+        return
+    if (type(norm), norm.vmin, norm.vmax) != (type(colorbar.norm), colorbar.norm.vmin, colorbar.norm.vmax):
+        colorbar.mappable.norm = norm
+
 def line(
     piece,
     pitch_type='tpc',
@@ -47,7 +125,8 @@ def line(
     """return the figure of a linechart with the notes in the X axis and their value in the Y axis
 
     Keyword arguments:
-    piece -- the absolute path to the .csv file containing the data or a DataFrame
+    piece -- the absolute path to the .csv (or .mxl/.xml) file containing the data or a DataFrame,
+        or (store, piece_id) for a piece of a reader.CorpusStore
     pitch_type -- the type of data that you want to be read (default 'tpc'), 'pc' could be use for twelve parts chart tpc form
         (tpc:[A, B#, Gbbb, ...], pc (pitch class):[0, 3, 7, ...])
     measures -- give a set of measures example [5, 18], will display the notes of the measures 5 to 18 included
@@ -62,43 +141,150 @@ def line(
     **kwargs -- these arguments are redirected to the matplotlib.pyplot.pie function, see informations at
                 https://matplotlib.org/api/_as_gen/matplotlib.pyplot.bar.html
     """
-    #get the df
-    if pitch_class_display:
-        df = get_df_short(piece, vocabulary=vocabulary, pitch_type='pc', measures=measures)
-    else:
-        df = get_df_short(piece, vocabulary=vocabulary, pitch_type=pitch_type, measures=measures)
-    #create the figure and close it so it wont be display
-    fig = plt.figure(figsize=figsize)
-    if not show:
-        plt.close(fig)
-    ax = fig.add_subplot(111)
-    
-    if not pitch_class_display:
-        df['fifth_number'] = df['tpc'].apply(get_fifth_nb)
-        xmin = df['fifth_number'].min() if xmin == None else xmin+1
-        xmax = df['fifth_number'].max() if xmax == None else xmax+1
-        labels = [get_fifth_note(i) for i in range(xmin, xmax+1)]
-    # Give the value to the notes, for their number of appearance
-    if normalize:
-        s = pd.Series(df['duration']/df['duration'].sum()) if duration else pd.Series(df['nb']/df['nb'].sum())
-    else:
-        s = pd.Series(df['duration']) if duration else pd.Series(df['nb'])
-    s.index = df['pc'] if pitch_class_display else df['tpc']
-    if pitch_class_display:
-        #reindex with integers to be compatible with the 'pc' value
-        pc_labels = np.roll([0, 7, 2, 9, 4, 11, 6, 1, 8, 3, 10, 5],
-                            -([0, 7, 2, 9, 4, 11, 6, 1, 8, 3, 10, 5].index(start)))
-        s = s.reindex(pc_labels).fillna(0)
-        #get the index in strings so it wont be reorder by the bar function
-        s.index = np.roll(['0', '7', '2', '9', '4', '11', '6', '1', '8', '3', '10', '5'],
-                          -([0, 7, 2, 9, 4, 11, 6, 1, 8, 3, 10, 5].index(start)))
-    else:
-        s = s.reindex(labels).fillna(0)
-    # Do the bar plot
-    ax.bar(x=s.index, color=color, height = s.values, log=log, **kwargs)
-    
-    return fig
-    
+    return LineRenderer(
+        piece,
+        pitch_type=pitch_type,
+        measures=measures,
+        log=log,
+        normalize=normalize,
+        vocabulary=vocabulary,
+        pitch_class_display=pitch_class_display,
+        duration=duration,
+        color=color,
+        figsize=figsize,
+        xmin=xmin,
+        xmax=xmax,
+        start=start,
+        show=show,
+        **kwargs).fig
+
+class LineRenderer(object):
+    """Linechart of line that can be redrawn with the values of other pieces.
+
+    The figure and the bars are built once for the first piece, with the same arguments as line,
+    update only changes the height of the bars, the notes in the X axis stay the same.
+    """
+
+    @profiled('static.line.layout')
+    def __init__(
+        self,
+        piece,
+        pitch_type='tpc',
+        measures=None,
+        log=False,
+        normalize=False,
+        vocabulary={0:'C', 1:'Db', 2:'D', 3:'Eb', 4:'E', 5:'F', 6:'Gb', 7:'G', 8:'Ab', 9:'A', 10:'Bb', 11:'B'},
+        pitch_class_display=False,
+        duration=False,
+        color='blue',
+        figsize=[6, 4],
+        xmin=None,
+        xmax=None,
+        start=0,
+        show=False,
+        **kwargs):
+        #settings for the updates
+        self.pitch_type = 'pc' if pitch_class_display else pitch_type
+        self.measures = measures
+        self.vocabulary = vocabulary
+        self.normalize = normalize
+        self.pitch_class_display = pitch_class_display
+        self.duration = duration
+        self.start = start
+
+        #get the df
+        df = _get_df_short(piece, vocabulary, self.pitch_type, measures, False)
+        #create the figure and close it so it wont be display
+        self.fig = _new_figure(figsize, show)
+        self.ax = self.fig.add_subplot(111)
+
+        if not pitch_class_display:
+            df['fifth_number'] = get_fifth_nb_array(df['tpc'])
+            xmin = df['fifth_number'].min() if xmin == None else xmin+1
+            xmax = df['fifth_number'].max() if xmax == None else xmax+1
+            self.labels = list(get_fifth_note_array(np.arange(xmin, xmax+1)))
+        # Do the bar plot
+        s = self._get_values(df)
+        self.bars = self.ax.bar(x=s.index, color=color, height = s.values, log=log, **kwargs)
+
+    @profiled('static.line.update')
+    def update(self, piece):
+        """draw the values of another piece in the bars and return the figure
+
+        Keyword arguments:
+        piece -- the absolute path to the .csv (or .mxl/.xml) file containing the data or a DataFrame,
+            (store, piece_id) for a piece of a reader.CorpusStore,
+            or a dict or a Series with the value of each note (tpc or pc like pitch_type)
+        """
+        s = self._get_values(_get_df_short(piece, self.vocabulary, self.pitch_type, self.measures, False))
+        for bar, height in zip(self.bars, s.values):
+            bar.set_height(height)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        return self.fig
+
+    def _get_values(self, df):
+        """return the Series of the heights of the bars indexed by their labels"""
+        # Give the value to the notes, for their number of appearance
+        if self.normalize:
+            s = pd.Series(df['duration']/df['duration'].sum()) if self.duration else pd.Series(df['nb']/df['nb'].sum())
+        else:
+            s = pd.Series(df['duration']) if self.duration else pd.Series(df['nb'])
+        s.index = df['pc'] if self.pitch_class_display else df['tpc']
+        if self.pitch_class_display:
+            #reindex with integers to be compatible with the 'pc' value
+            pc_labels = np.roll([0, 7, 2, 9, 4, 11, 6, 1, 8, 3, 10, 5],
+                                -([0, 7, 2, 9, 4, 11, 6, 1, 8, 3, 10, 5].index(self.start)))
+            s = s.reindex(pc_labels).fillna(0)
+            #get the index in strings so it wont be reorder by the bar function
+            s.index = np.roll(['0', '7', '2', '9', '4', '11', '6', '1', '8', '3', '10', '5'],
+                              -([0, 7, 2, 9, 4, 11, 6, 1, 8, 3, 10, 5].index(self.start)))
+        else:
+            s = s.reindex(self.labels).fillna(0)
+        return s
+
+def _get_wedge_table(df_data, fifths, vocabulary):
+    """return the DataFrame of the wedges of the tpc piechart with the columns 'note' and 'part'
+
+    Keyword arguments:
+    df_data -- the notes of the piece with their 'step', 'acc', 'pc' and 'tpc'
+    fifths -- if True a wedge for each fifth between the lowest and the highest fifth of the piece,
+        if not the twelve pitch classes in chromatic order, shared between their tpc notes
+    vocabulary -- the conversion dictionary from pitch class to tpc for the pitch classes not in the piece
+    """
+    if fifths:
+        piece_fifths = get_fifth_nb_array(df_data['tpc'])
+        all_fifths = np.arange(piece_fifths.min(), piece_fifths.max() + 1)
+        return pd.DataFrame({'note': get_fifth_note_array(all_fifths), 'part': 1.0})
+
+    #each pitch class is shared between the tpc notes of the piece, in their order in the data
+    df_pie = pd.DataFrame({
+        'pc': df_data['pc'].to_numpy(),
+        'note': put_flat_sharp_array(df_data['step'], df_data['acc']),
+        'part': 1 / df_data.groupby('pc')['pc'].transform('size').to_numpy()})
+    missing_pc = [pc for pc in range(12) if pc not in set(df_data['pc'])]
+    df_missing = pd.DataFrame({
+        'pc': missing_pc,
+        'note': [vocabulary[pc] for pc in missing_pc],
+        'part': 1.0})
+    df_pie = pd.concat([df_pie, df_missing], ignore_index=True).sort_values('pc', kind='stable')
+    return df_pie[['note', 'part']].reset_index(drop=True)
+
+def _get_colors(values, cmap, norm, nan_color):
+    """return (colors, normalized values) of the values, the notes that do not appear in the piece are nan
+
+    The missing notes are in nan_color if it is given, in cmap(0) otherwise, and their normalized value is 0
+    """
+    values = np.asarray(values, dtype=float)
+    found = ~np.isnan(values)
+    color_nb = np.zeros(values.shape[0])
+    if found.any():
+        color_nb[found] = norm(values[found])
+    colors = cmap(color_nb)
+    if pd.isnull(nan_color) == False:
+        colors[~found] = matplotlib.colors.to_rgba(nan_color)
+    return (colors, color_nb)
+
 def circle(
     piece,
     pitch_type='tpc',
@@ -120,7 +306,8 @@ def circle(
     """return the figure of a piechart with importance of the notes that are represented by the colour as a heatmap
 
     Keyword arguments:
-    piece -- the absolute path to the .csv file containing the data or a DataFrame
+    piece -- the absolute path to the .csv (or .mxl/.xml) file containing the data or a DataFrame,
+        or (store, piece_id) for a piece of a reader.CorpusStore
     pitch_type -- the type of data that you want to be read (default 'tpc'), 'pc' could be use for twelve parts chart tpc form
         (tpc:[A, B#, Gbbb, ...], pc (pitch class):[0, 3, 7, ...])
     measures -- give a set of measures example [5, 18], will display the notes of the measures 5 to 18 included
@@ -140,236 +327,213 @@ def circle(
     **kwargs -- these arguments are redirected to the matplotlib.pyplot.pie function, see informations at
                 https://matplotlib.org/api/_as_gen/matplotlib.pyplot.pie.html
     """
-    #settings
-    df = get_df_short(piece, vocabulary=vocabulary, pitch_type=pitch_type, measures=measures, duration=duration)
-
-    #color map
-    cmap = matplotlib.cm.get_cmap(cmap)
-    color_note = []
-
-    #dataFrame for the plot if tpc
-    df_tpc_pie = pd.DataFrame(columns=['note', 'part', 'pc'])
-
-    #put top in the right form
-    if pd.isnull(top) == False:
-        if is_tpc(top) and pitch_class_display:
-            top = get_pc(top)
-        if is_pc(top) and not pitch_class_display:
-            top = vocabulary[int(top)]
-
-    #remember position of data in Series
-    s_pos = pd.Series()
-    count = 0
-    part = 0
-    letter = 'nan'
-    s_fifth = pd.Series()
-    
-    fig = plt.figure(figsize=figsize)
-    if not show:
-        plt.close(fig)
-    ax = fig.add_subplot(111, aspect='equal')
-    
-    #Set the order in function of fifth
-    if fifths:
-        s_tpc_format = pd.Series((0, 7, 2, 9, 4, 11, 6, 1, 8, 3, 10, 5))
-    else:
-        s_tpc_format = pd.Series((0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11))
+    return CircleRenderer(
+        piece,
+        pitch_type=pitch_type,
+        measures=measures,
+        log=log,
+        vocabulary=vocabulary,
+        pitch_class_display=pitch_class_display,
+        colorbar=colorbar,
+        duration=duration,
+        fifths=fifths,
+        figsize=figsize,
+        top=top,
+        rotation=rotation,
+        clockwise=clockwise,
+        cmap=cmap,
+        nan_color=nan_color,
+        show=show,
+        **kwargs).fig
+
+class CircleRenderer(object):
+    """Piechart of circle that can be redrawn with the values of other pieces.
+
+    The figure and the wedges are built once for the first piece, with the same arguments as circle,
+    update only changes the colors of the wedges and the colorbar. In tpc the wedges stay the ones
+    of the first piece, the notes of the other pieces that have no wedge are not displayed.
+    """
 
-    #for plot if pitch_class_display
-    s_twelve_ones = pd.Series((1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1), index=s_tpc_format)
+    @profiled('static.circle.layout')
+    def __init__(
+        self,
+        piece,
+        pitch_type='tpc',
+        measures=None,
+        log=False,
+        vocabulary={0:'C', 1:'Db', 2:'D', 3:'Eb', 4:'E', 5:'F', 6:'Gb', 7:'G', 8:'Ab', 9:'A', 10:'Bb', 11:'B'},
+        pitch_class_display=False,
+        colorbar=True,
+        duration=False,
+        fifths=True,
+        figsize=[7, 4],
+        top=None,
+        rotation=0,
+        clockwise=True,
+        cmap='Blues',
+        nan_color=None,
+        show=False,
+        **kwargs):
+        #settings for the updates
+        self.pitch_type = pitch_type
+        self.measures = measures
+        self.log = log
+        self.vocabulary = vocabulary
+        self.pitch_class_display = pitch_class_display
+        self.duration = duration
+        self.clockwise = clockwise
+        self.nan_color = nan_color
+
+        #settings
+        df = _get_df_short(piece, vocabulary, pitch_type, measures, duration)
+
+        #color map
+        self.cmap = _get_cmap(cmap)
+
+        #put top in the right form
+        if pd.isnull(top) == False:
+            if is_tpc(top) and pitch_class_display:
+                top = get_pc(top)
+            if is_pc(top) and not pitch_class_display:
+                top = vocabulary[int(top)]
 
-    #if it show the tpc values
-    if pitch_class_display == False:
-        #put the right values in 'number'
-        if duration:
-            df_data = df.copy()
-            df_data.rename(columns={'duration': 'number'},inplace=True)
-        else:
-            df_data = df.copy()
-            df_data.rename(columns={'nb': 'number'},inplace=True)
+        self.fig = _new_figure(figsize, show)
+        self.ax = self.fig.add_subplot(111, aspect='equal')
 
-        #Normalize the values for the colors
-        max_value = df_data['number'].max()
-        min_value = df_data['number'].min()
-        if log:
-            norm = matplotlib.colors.LogNorm(vmin=min_value, vmax=max_value)
+        #Set the order in function of fifth
+        if fifths:
+            self.s_tpc_format = pd.Series((0, 7, 2, 9, 4, 11, 6, 1, 8, 3, 10, 5))
         else:
-            norm = matplotlib.colors.Normalize(0, vmax=max_value)
-        
-        #for chromatic order
-        if fifths == False:
-
-            #for each pitch class values
-            for i in range(12):
-
-                #if a pitch class is represented in the data
-                if df_data['pc'].isin([s_tpc_format[i]]).any():
-                    count = 0
-                    s_pos.drop(s_pos.index, inplace=True)
-                    
-                    #count how much time there is tpc values for a same pitch class
-                    for j in range(df_data['pc'].isin([s_tpc_format[i]]).shape[0]):
-                       if df_data['pc'].isin([s_tpc_format[i]])[j]:
-                           s_pos.at[count] = j
-                           count = count + 1
-
-                    #devide the pie part and set color
-                    for j in range(count):
-                        part = 1/count
-                        letter = df_data.at[s_pos.at[j], 'step']
-
-                        #write the notes
-                        letter = put_flat_sharp(letter, df_data.at[s_pos.at[j], 'acc'])
-
-                        #register the informations
-                        df_tpc_pie = df_tpc_pie.append({'note':letter, 'part':part},
-                                                       ignore_index=True)
-                        color_note.append(cmap(norm(df_data.at[s_pos.at[j], 'number'])))
-
-                #if the pitch class do no appear in the piece
-                else:
-                    letter = vocabulary[s_tpc_format[i]]
+            self.s_tpc_format = pd.Series((0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11))
 
-                    df_tpc_pie = df_tpc_pie.append({'note':letter, 'part':1}, ignore_index=True)
-                    if pd.isnull(nan_color):
-                        color_note.append(cmap(0))
-                    else:
-                        color_note.append(nan_color)
-        else:
-            #get the fifth numbers of the notes
-            for i in range(df_data.shape[0]):
-                s_fifth.at[i] = get_fifth_nb(df_data.at[i, 'tpc'])
-            df_data['fifth'] = s_fifth
-
-            #create df_tpc_pie and get the colours
-            for i in range(df_data['fifth'].max()-df_data['fifth'].min()+1):
-                #the part are equal for the moment
-                df_tpc_pie.at[i, 'part'] = 1
-                df_tpc_pie.at[i, 'note'] = get_fifth_note(i + df_data['fifth'].min())
-                df_tpc_pie.at[i, 'pc'] = get_pc(df_tpc_pie.at[i, 'note'])
-                
-                if df_data['fifth'].isin([i + df_data['fifth'].min()]).any():
-                    #get the colour for the note who has the good fifth number
-                    color_note.append(cmap(norm(df_data['number'][df_data['fifth']==(i + df_data['fifth'].min())].iat[0])))
-                elif df_data['fifth'].isin([i + df_data['fifth'].min()]).any() == False and pd.isnull(nan_color) == False:
-                    color_note.append(nan_color)
+        #if it show the tpc values
+        if pitch_class_display == False:
+            #the wedges of the pie chart, in the order of the pitch classes or of the fifths
+            df_tpc_pie = _get_wedge_table(df, fifths, vocabulary)
+            self.wedge_notes = df_tpc_pie['note'].to_numpy()
+            norm, color_note = self._get_colors(df)
+            parts = df_tpc_pie['part'].to_numpy()
+
+            #calculate the angle for the top note to be at the middle of the top
+            #the wedges are counted in the order of the table whatever the orientation
+            top_index = np.flatnonzero(self.wedge_notes == top) if pd.isnull(top) == False else []
+            if len(top_index) > 0:
+                #the sens of reading depend on the orientation
+                sens = 1 if clockwise else -1
+                top_index = top_index[0]
+                if fifths:
+                    rotation = rotation + 90 + sens * (180 + top_index * 360) / parts.shape[0]
                 else:
-                    color_note.append(cmap(0))
+                    #the pitch classes are of 30 degrees, shared between their tpc notes
+                    rotation = rotation + 90 + sens * (parts[0] * 15 + 30 * parts[:top_index].sum())
+                    if parts[top_index] != 1:
+                        rotation = rotation - sens * 15 * parts[top_index]
 
-        #if clockwise invert the order of the data to be displayed clockwise, inverse also the index
-        if clockwise:
-            df_tpc_pie = df_tpc_pie.iloc[::-1]
-            color_note = list(reversed(color_note))
+            #put nice sharps and flats
+            labels = df_tpc_pie['note'].str.replace('b', r'$\flat$').str.replace('#', r'$\sharp$')
 
-        #calculate the angle for the topPitchClass to be at the top
-        if pd.isnull(top) == False and fifths == False and df_tpc_pie['note'].isin([top]).any() == True:
+            #if clockwise invert the order of the data to be displayed clockwise
             if clockwise:
-                rotation = rotation + 90 + df_tpc_pie.at[0, 'part'] * 15
-            else:
-                rotation = rotation + 90 - df_tpc_pie.at[0, 'part'] * 15
-            for i in range(df_tpc_pie.shape[0]):
-                if top == df_tpc_pie.at[i, 'note']:
-                    if df_tpc_pie.at[i, 'part'] != 1:
-                        if clockwise:
-                            rotation = rotation - 15*df_tpc_pie.at[i, 'part']
-                        else:
-                            rotation = rotation + 15*df_tpc_pie.at[i, 'part']
-                    break
-                else:
-                    if clockwise:
-                        rotation = rotation + 30*df_tpc_pie.at[i, 'part']
-                    else:
-                        rotation = rotation - 30*df_tpc_pie.at[i, 'part']
+                labels = labels[::-1]
+                parts = parts[::-1]
+
+            #do the pie chart
+            self.wedges = self.ax.pie(labels=labels.to_numpy(), x=parts, colors=color_note, startangle=rotation,
+                                      **kwargs)[0]
+
+        #display with the pc values
+        else:
+            norm, color_note = self._get_colors(df)
 
-        #put the top note at the top
-        if pd.isnull(top) == False and fifths == True and df_tpc_pie['note'].isin([top]).any() == True:
+            #for plot if pitch_class_display, inverted to be displayed clockwise
+            s_twelve_ones = pd.Series((1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1), index=self.s_tpc_format)
             if clockwise:
-                rotation = rotation + 90 + 180/df_tpc_pie.shape[0]
-            else:
-                rotation = rotation  + 90 - 180/df_tpc_pie.shape[0]
-            for i in range (df_tpc_pie.shape[0]):
-                if df_tpc_pie.at[i, 'note'] == top:
-                    break
-                else:
-                    #the sens of reading depend on the orientation
-                    if clockwise:
-                        rotation = rotation + 360/df_tpc_pie.shape[0]
-                    else:
-                        rotation = rotation - 360/df_tpc_pie.shape[0]
-                
-
-        #put nice sharps and flats
-        for i in range(df_tpc_pie.shape[0]):
-            df_tpc_pie.at[i, 'note'] = df_tpc_pie.at[i, 'note'].replace('b', r'$\flat$')\
-                                                               .replace('#', r'$\sharp$')
-            
-        #plot the piechart with index 'tpc'
-        df_tpc_pie.index = df_tpc_pie['note']
-        
-        #do the pie chart
-        ax.pie(labels=df_tpc_pie.index, x=df_tpc_pie['part'], colors=color_note, startangle=rotation, **kwargs)
+                s_twelve_ones = s_twelve_ones.iloc[::-1]
+
+            #calculate the angle for the topPitchClass to be at the top
+            if pd.isnull(top) == False:
+                top_index = np.flatnonzero(s_twelve_ones.index == top)
+                if len(top_index) > 0:
+                    rotation = rotation + 75 - top_index[0] * 30
+            self.wedges = self.ax.pie(labels=s_twelve_ones.index, x=s_twelve_ones, colors=color_note,
+                                      startangle=rotation, **kwargs)[0]
 
         #if asked plot the colorbar left of the piechart
+        self.colorbar = None
         if colorbar:
-            ax2 = fig.add_subplot(1, 10, 1)
-            cb1 = matplotlib.colorbar.ColorbarBase(ax2, cmap=cmap, norm=norm, orientation='vertical')
-            
-    #display with the pc values
-    else:
-        #put the right values in 'number'
-        if duration:
-            df_data = pd.concat(
-                [df['pc'], df['duration']],
-                axis=1,
-                keys=['pc', 'number'])
-        else:
-            df_data = pd.concat(
-                [df['pc'], df['nb']],
-                axis=1,
-                keys=['pc', 'number'])
+            ax2 = self.fig.add_subplot(1, 10, 1)
+            self.colorbar = matplotlib.colorbar.ColorbarBase(ax2, cmap=self.cmap, norm=norm, orientation='vertical')
+
+    @profiled('static.circle.update')
+    def update(self, piece):
+        """color the wedges with the values of another piece and return the figure
+
+        Keyword arguments:
+        piece -- the absolute path to the .csv (or .mxl/.xml) file containing the data or a DataFrame,
+            (store, piece_id) for a piece of a reader.CorpusStore,
+            or a dict or a Series with the value of each note (tpc or pc like pitch_type)
+        """
+        norm, colors = self._get_colors(
+            _get_df_short(piece, self.vocabulary, self.pitch_type, self.measures, self.duration))
+        for wedge, color in zip(self.wedges, colors):
+            wedge.set_facecolor(color)
+        _set_colorbar_norm(self.colorbar, norm)
+        return self.fig
+
+    def _get_colors(self, df):
+        """return (norm, colors of the wedges in the order they are drawn) for the values of df"""
+        number = df['duration'] if self.duration else df['nb']
 
         #Normalize the values for the colors
-        max_value = df_data['number'].max()
-        min_value = df_data['number'].min()
-        if log:
-            norm = matplotlib.colors.LogNorm(vmin=min_value, vmax=max_value)
+        norm = _get_norm(number, self.log)
+
+        if self.pitch_class_display == False:
+            #the value of the note of each wedge
+            s_number = pd.Series(number.to_numpy(), index=put_flat_sharp_array(df['step'], df['acc']))
+            values = s_number.reindex(self.wedge_notes).to_numpy(dtype=float)
         else:
-            norm = matplotlib.colors.Normalize(0, vmax=max_value)
-        
-        #set data df_data
-        df_data = (df_data.groupby('pc')).sum()
-        df_data = df_data.reindex(s_tpc_format)
-        df_data.fillna(0, inplace=True)
-
-        #set colors
-        for i in range(0, 12):
-            if df_data.iat[i, 0] != 0:
-                color_note.append(cmap(norm(df_data.iat[i, 0])))
-            else:
-                if pd.isnull(nan_color):
-                    color_note.append(cmap(0))
-                else:
-                    color_note.append(nan_color)
+            #the pitch classes with a value of 0 do not appear in the piece
+            values = number.groupby(df['pc']).sum().reindex(self.s_tpc_format).fillna(0).to_numpy(dtype=float)
+            values = np.where(values != 0, values, np.nan)
+        colors = _get_colors(values, self.cmap, norm, self.nan_color)[0]
 
         #if clockwise invert the order of the data to be displayed clockwise
-        if clockwise:
-            s_twelve_ones = s_twelve_ones.iloc[::-1]
-            color_note = list(reversed(color_note))
+        if self.clockwise:
+            colors = colors[::-1]
+        return (norm, colors)
 
-        #calculate the angle for the topPitchClass to be at the top
-        if pd.isnull(top) == False:
-            for i in range(s_tpc_format.shape[0]):
-                if top == (s_twelve_ones.index)[i]:
-                    rotation = rotation + 75 - i * 30
-                    break
-        ax.pie(labels=s_twelve_ones.index, x=s_twelve_ones, colors=color_note, startangle=rotation, **kwargs)
+@lru_cache(maxsize=1024)
+def _get_label_path(label):
+    """return the path of a label for a font of size 1, centered on (0, 0)"""
+    text_path = TextPath((0, 0), label, size=1)
+    extents = text_path.get_extents()
+    return text_path.transformed(Affine2D().translate(-(extents.x0 + extents.x1) / 2, -(extents.y0 + extents.y1) / 2))
 
-        #if asked plot the colorbar left of the piechart
-        if colorbar:
-            ax2 = fig.add_subplot(1, 10, 1)
-            cb1 = matplotlib.colorbar.ColorbarBase(ax2, cmap=cmap, norm=norm, orientation='vertical')
-    return fig
+def _add_text_collection(ax, x, y, labels, colors, size):
+    """add the labels centered on the positions (x, y) as one collection of paths and return it
 
+    Keyword arguments:
+    ax -- the axes where the labels are drawn
+    x, y -- the positions of the labels in data coordinates
+    labels -- the texts, they can contain mathtext like ax.text
+    colors -- the color of each label
+    size -- the size of the font in points
+    """
+    #the keyword of the transform of the offsets is transOffset before matplotlib 3.6
+    if hasattr(PathCollection, 'set_offset_transform'):
+        offset_transform = {'offset_transform': ax.transData}
+    else:
+        offset_transform = {'transOffset': ax.transData}
+    #the paths are scaled in points around the positions so the labels keep their size whatever the dpi
+    return ax.add_collection(PathCollection(
+        [_get_label_path(label) for label in labels],
+        offsets=np.column_stack([x, y]),
+        transform=Affine2D().scale(size / 72) + ax.figure.dpi_scale_trans,
+        facecolors=colors,
+        edgecolors='none',
+        zorder=3,
+        **offset_transform),
+        autolim=False)
 
 def tonnetz(
     piece,
@@ -389,12 +553,14 @@ def tonnetz(
     nan_color=None,
     edgecolor=None,
     center=None,
+    batch_labels=False,
     show=False, # CHANGE IT TO SHOW
     **kwargs):
     """return the figure of a 2D grid of hexagons, each hexagons being a note
 
     Keyword arguments:
-    piece -- the absolute path to the .csv file containing the data or a DataFrame
+    piece -- the absolute path to the .csv (or .mxl/.xml) file containing the data or a DataFrame,
+        or (store, piece_id) for a piece of a reader.CorpusStore
     pitch_type -- the type of data that you want to be read (default 'tpc'), 'pc' could be use for twelve parts chart tpc form
         (tpc:[A, B#, Gbbb, ...], pc (pitch class):[0, 3, 7, ...])
     measures -- give a set of measures example [5, 18], will display the notes of the measures 5 to 18 included
@@ -412,329 +578,242 @@ def tonnetz(
     nan_color -- give the possibility to set a color for the note that do not appear in the piece (default None)
     center -- you can set the note that will be in the center of the grid,
         by default it put the most recurent note in the center (default None)
+    batch_labels -- if True the labels are drawn as one collection of paths and not one text each,
+        faster for big grids but the text is not hinted like matplotlib texts (default False)
     display -- if True the figure is displayed, if False it is hidden so you can have only the returned figure
-    **kwargs -- these arguments are redirected to matplotlib.patches.RegularPolygon, see informations at
-                https://matplotlib.org/api/_as_gen/matplotlib.patches.RegularPolygon.html
+    **kwargs -- these arguments are redirected to the matplotlib.collections.PolyCollection of the hexagons,
+                see informations at https://matplotlib.org/api/collections_api.html
     """
-    #===================================================================================
-    #constant, parameter, variables
-    #===================================================================================
-
-    #settings
-    df_data = get_df_short(piece, vocabulary=vocabulary, pitch_type=pitch_type, measures=measures, duration=duration)
-    
-    #constant
-    HEXEDGE = math.sqrt(3)/2 #math constant
-
-    #intern variables
-    length = 0.05 * hex_size * 1.5 * 3 / radius#radius and border length of the hexagons
-    center_pos = [0.5, 0.5] # set the center on the center of the map
-    size_text = length * 150 * fontsize # parameter fontsize
-    pos = [0, 0, 0] #x, y, z
-    pos_ser = (0, 0, 0) #for serching in the data
-    a_center = ['F', 0] # the center that was define (note, sup)
-    color_nb = 0
-    color_text = 'Black' # by default
-    show_hex = True
-
-    #Normalize the numbers for colours
-    if duration:
-        max_val_tpc = df_data['duration'].max()
-        min_val_tpc = df_data['duration'].min()
-    else:
-        max_val_tpc = df_data['nb'].max()
-        min_val_tpc = df_data['nb'].min()
-    if log:
-        norm = matplotlib.colors.LogNorm(vmin=min_val_tpc, vmax=max_val_tpc)
-    else:
-        norm = matplotlib.colors.Normalize(vmin=0, vmax=max_val_tpc)
-
-    found = False
-
-    #define figure
-    fig = plt.figure(figsize=figsize)
-    if not show:
-        plt.close(fig)
-    ax = fig.add_subplot(111, aspect='equal')
-    
-    
-    #colormap for the layout
-    cmap = matplotlib.cm.get_cmap(cmap)
-
-    #is the list of hexagon already define
-    if pitch_class_display:
-        columns = ['pos', 'note']
-    else:
-        columns = ['pos', 'note', 'acc']
-    df_pos = pd.DataFrame(columns=columns)
-
-    #give the notes'neighbours
-    df_nei = pd.DataFrame.from_dict(get_dic_nei(pitch_class_display))
-
-    #give the direction to look to for the nearest define hexagon
-    x_list = [-1, 1, 0, 0, 1, -1]
-    y_list = [1, -1, -1, 1, 0, 0]
-    z_list = [0, 0, 1, -1, -1, 1]
-
-    #===================================================================================
-    #hexgrid
-    #===================================================================================
-
-    #do the first hexagon of the center
-    #if not define it takes the most current note
-    if pd.isnull(center):
-        #draw the hexagon
-        p = patches.RegularPolygon(center_pos, 6, radius=length, color=cmap(1/1), **kwargs)
-        
+    return TonnetzRenderer(
+        piece,
+        pitch_type=pitch_type,
+        measures=measures,
+        pitch_class_display=pitch_class_display,
+        duplicate=duplicate,
+        duration=duration,
+        log=log,
+        colorbar=colorbar,
+        vocabulary=vocabulary,
+        radius=radius,
+        hex_size=hex_size,
+        fontsize=fontsize,
+        figsize=figsize,
+        cmap=cmap,
+        nan_color=nan_color,
+        edgecolor=edgecolor,
+        center=center,
+        batch_labels=batch_labels,
+        show=show,
+        **kwargs).fig
+
+class TonnetzRenderer(object):
+    """Grid of tonnetz that can be redrawn with the values of other pieces.
+
+    The figure, the hexagons and their labels are built once for the first piece, with the same
+    arguments as tonnetz, update only changes the colors of the hexagons, of the labels and the
+    colorbar. If center is not given the grid stays centered on the most current note of the first piece.
+    """
+
+    @profiled('static.tonnetz.layout')
+    def __init__(
+        self,
+        piece,
+        pitch_type='tpc',
+        measures=None,
+        pitch_class_display=False,
+        duplicate=True,
+        duration=False,
+        log=False,
+        colorbar=True,
+        vocabulary={0:'C', 1:'Db', 2:'D', 3:'Eb', 4:'E', 5:'F', 6:'Gb', 7:'G', 8:'Ab', 9:'A', 10:'Bb', 11:'B'},
+        radius=3,
+        hex_size=1,
+        fontsize=1,
+        figsize=[7, 4],
+        cmap='Blues',
+        nan_color=None,
+        edgecolor=None,
+        center=None,
+        batch_labels=False,
+        show=False, # CHANGE IT TO SHOW
+        **kwargs):
+        #===================================================================================
+        #constant, parameter, variables
+        #===================================================================================
+
+        #settings for the updates
+        self.pitch_type = pitch_type
+        self.measures = measures
+        self.pitch_class_display = pitch_class_display
+        self.duration = duration
+        self.log = log
+        self.vocabulary = vocabulary
+        self.nan_color = nan_color
+        self.edgecolor = edgecolor
+        self.center = center
+
+        #settings
+        df_data = _get_df_short(piece, vocabulary, pitch_type, measures, duration)
+
+        #constant
+        HEXEDGE = math.sqrt(3)/2 #math constant
+
+        #intern variables
+        length = 0.05 * hex_size * 1.5 * 3 / radius#radius and border length of the hexagons
+        size_text = length * 150 * fontsize # parameter fontsize
+        a_center = ['F', 0] # the center that was define (note, sup)
+
+        #define figure
+        self.fig = _new_figure(figsize, show)
+        self.ax = self.fig.add_subplot(111, aspect='equal')
+
+        #colormap for the layout
+        self.cmap = _get_cmap(cmap)
+
+        #===================================================================================
+        #hexgrid
+        #===================================================================================
+
+        #the center of the grid
+        #if not define it takes the most current note
+        if pd.isnull(center):
+            if pitch_class_display:
+                layout_center = [int(df_data['pc'][0]), 0]
+            else:
+                layout_center = [df_data['step'][0], df_data['acc'][0]]
+        else: #read the given note
+            if pitch_class_display:
+                a_center = [int(center), 0]
+            else:
+                a_center[0] = get_step(center)
+                a_center[1] = get_acc(center)
+            layout_center = list(a_center)
+
+        #the hexagonal grid, computed once for each center and radius
+        layout = get_hex_layout(layout_center[0], layout_center[1], radius, pitch_class_display)
+
+        #the hexagons are drawn in one collection, in the order of the layout
+        hex_index = [] # index in the layout of the hexagons drawn
+        placed_notes = set() # the notes already displayed, pc or (note, acc)
+        for index in range(len(layout)):
+            if pitch_class_display:
+                note = layout[index][1]
+            else:
+                note = (layout[index][1], layout[index][2])
+
+            #if no duplicate then check if the note is already display
+            if duplicate or note not in placed_notes:
+                hex_index.append(index)
+                placed_notes.add(note)
+
+        #the notes of the hexagons, read as in the values of the pieces
         if pitch_class_display:
-            ax.text(
-                center_pos[0],
-                center_pos[1],
-                str(int(df_data['pc'][0])),
-                color='white',
-                horizontalalignment='center',
-                verticalalignment='center',
-                size=size_text)
-            df_pos = df_pos.append(
-                {'pos':(0,0,0), 'note':df_data['pc'][0]},
-                ignore_index=True)
+            self.hex_notes = [str(int(layout[index][1])) for index in hex_index]
         else:
-            ax.text(
-                center_pos[0],
-                center_pos[1],
-                put_flat_sharp(df_data['step'][0], df_data['acc'][0]).replace('#', r'$\sharp$') \
-                              .replace('b', r'$\flat$'),
-                color='white',
-                horizontalalignment='center',
-                verticalalignment='center',
-                size=size_text)
-            df_pos = df_pos.append(
-                {'pos':(0,0,0), 'note':df_data['step'][0], 'acc':df_data['acc'][0]},
-                ignore_index=True)
-        ax.add_patch(p)
-        
-    else: #read the given note and display it
+            self.hex_notes = [(layout[index][1], layout[index][2]) for index in hex_index]
+
+        #the labels of the hexagons
         if pitch_class_display:
-            df_pos = df_pos.append(
-                {'pos':(0,0,0), 'note':center},
-                ignore_index=True)
+            labels = [str(int(layout[index][1])) for index in hex_index]
         else:
-            a_center[0] = get_step(center)
-            a_center[1] = get_acc(center)
-            df_pos = df_pos.append(
-                {'pos':(0,0,0), 'note':a_center[0], 'acc':a_center[1]},
-                ignore_index=True)
-        
-        #set the color
-        color = cmap(0)
-        found = False
-        color_nb = 0
-        for l in range(df_data.shape[0]):
-            if pitch_class_display:
-                if str(int(df_data.at[l, 'pc'])) == str(center):
-                    if duration:
-                        color = cmap(norm(df_data.at[l, 'duration']))
-                        color_nb = norm(df_data.at[l, 'duration'])
-                    else:
-                        color = cmap(norm(df_data.at[l, 'nb']))
-                        color_nb = norm(df_data.at[l, 'nb'])
-                    found = True
-            else:
-                if df_data.at[l, 'step'] == a_center[0] and df_data.at[l, 'acc'] == a_center[1]:
-                    if duration:
-                        color = cmap(norm(df_data.at[l, 'duration']))
-                        color_nb = norm(df_data.at[l, 'duration'])
-                    else:
-                        color = cmap(norm(df_data.at[l, 'nb']))
-                        color_nb = norm(df_data.at[l, 'nb'])
-                    found = True
-                    
-        if found == False and pd.isnull(nan_color) == False:
-            color = nan_color
+            labels = [put_flat_sharp(layout[index][1], layout[index][2]).replace('#', r'$\sharp$') \
+                                                                     .replace('b', r'$\flat$')
+                      for index in hex_index]
+
+        #the most current note in the center is in the darkest color
+        norm, face_colors, edge_colors, label_colors = self._get_colors(df_data, pd.isnull(center))
+
+        #calcul the center position of the hexs in function of the coordonnates
+        positions = np.array([layout[index][0] for index in hex_index], dtype=float)
+        hex_x = 0.5 + positions[:, 0] * HEXEDGE * length - positions[:, 1] * HEXEDGE * length
+        hex_y = 0.5 + positions[:, 0] * length / 2 + positions[:, 1] * length / 2 - positions[:, 2] * length
+
+        #draw all the hexagons at once, with the corners of matplotlib.patches.RegularPolygon
+        corners = Path.unit_regular_polygon(6).vertices[:-1] * length
+        vertices = np.stack([hex_x, hex_y], axis=1)[:, np.newaxis, :] + corners
+        self.hexagons = PolyCollection(vertices, facecolors=face_colors, edgecolors=edge_colors, **kwargs)
+        self.ax.add_collection(self.hexagons, autolim=False)
+
+        #draw the labels, a collection of paths or a list of texts
+        if batch_labels:
+            self.labels = _add_text_collection(self.ax, hex_x, hex_y, labels, label_colors, size_text)
+        else:
+            self.labels = []
+            for index in range(len(labels)):
+                self.labels.append(self.ax.text(
+                    hex_x[index],
+                    hex_y[index],
+                    labels[index],
+                    color=label_colors[index],
+                    horizontalalignment='center',
+                    verticalalignment='center',
+                    size=size_text))
+
+        #display a colorbar if asked
+        self.colorbar = None
+        if colorbar:
+            ax2 = self.fig.add_subplot(1, 10, 1)
+            self.colorbar = matplotlib.colorbar.ColorbarBase(ax2, cmap=self.cmap,
+                                                             norm=norm,
+                                                             orientation='vertical')
+
+        #display off the axis
+        self.ax.axis('off')
+
+    @profiled('static.tonnetz.update')
+    def update(self, piece):
+        """color the hexagons with the values of another piece and return the figure
+
+        Keyword arguments:
+        piece -- the absolute path to the .csv (or .mxl/.xml) file containing the data or a DataFrame,
+            (store, piece_id) for a piece of a reader.CorpusStore,
+            or a dict or a Series with the value of each note (tpc or pc like pitch_type)
+        """
+        norm, face_colors, edge_colors, label_colors = self._get_colors(
+            _get_df_short(piece, self.vocabulary, self.pitch_type, self.measures, self.duration))
+        self.hexagons.set_facecolor(face_colors)
+        self.hexagons.set_edgecolor(edge_colors)
+        if isinstance(self.labels, list):
+            for text, color in zip(self.labels, label_colors):
+                text.set_color(color)
+        else:
+            self.labels.set_facecolor(label_colors)
+        _set_colorbar_norm(self.colorbar, norm)
+        return self.fig
 
-        #define the color af the label in function of the color of the hexagon
-        if color_nb > 0.6:
-            color_text = 'White'
+    def _get_colors(self, df_data, highlight_center=False):
+        """return (norm, face colors, edge colors, label colors) of the hexagons for the values of df_data
+
+        If highlight_center is True the center is in the darkest color.
+        """
+        value = df_data['duration'] if self.duration else df_data['nb']
+
+        #Normalize the numbers for colours
+        norm = _get_norm(value, self.log)
+
+        #the value of each note of the piece, the notes are read as in the layout
+        if self.pitch_class_display:
+            note_values = dict(zip(df_data['pc'].astype(int).astype(str), value))
         else:
-            color_text = 'Black'
-            
-        if pitch_class_display == False:
-            a_center[0] = put_flat_sharp(a_center[0], a_center[1])
-            
-        if not edgecolor:
-            edgecolor = color
-        #draw and add labels
-        p = patches.RegularPolygon(
-            center_pos,
-            6,
-            radius=length,
-            facecolor=color,
-            edgecolor=edgecolor,
-            **kwargs)
-        if pitch_class_display:
-            ax.text(
-                center_pos[0],
-                center_pos[1],
-                str(int(center)),
-                color=color_text,
-                horizontalalignment='center',
-                verticalalignment='center',
-                size=size_text)
+            note_values = dict(zip(zip(df_data['step'], df_data['acc']), value))
+
+        #set the facecolor of the hexs with the values of their notes, cmap(0) for the missing notes
+        values = [note_values.get(note, np.nan) for note in self.hex_notes]
+        face_colors, color_nb = _get_colors(values, self.cmap, norm, self.nan_color)
+
+        #define the color af the label in function of the color of the hexagon
+        label_colors = np.where(color_nb > 0.6, 'White', 'Black')
+
+        if highlight_center:
+            face_colors[0] = self.cmap(1/1)
+            label_colors[0] = 'white'
+
+        #by default the edges are in the color of the center, or of the first hex around it if the center was not given
+        if self.edgecolor:
+            edge_colors = np.tile(matplotlib.colors.to_rgba(self.edgecolor), (len(values), 1))
         else:
-            ax.text(
-                center_pos[0],
-                center_pos[1],
-                a_center[0].replace('#', r'$\sharp$') \
-                               .replace('b', r'$\flat$'),
-                color=color_text,
-                horizontalalignment='center',
-                verticalalignment='center',
-                size=size_text)
-        ax.add_patch(p)
-
-    #do the rest of the plot except the first hex
-    for layer in range(radius + 1): #for each layer
-        for i in range(3): #for x,y,z
-            for j in range(2): #for negative and positive value
-                for k in range(layer): #to do the number of hexagon on sides
-                    #set the position of the hexagon
-                    pos[(0 + i) % 3] = layer * ((-1) ** j)
-                    pos[(1 + i) % 3] = (-layer + k) * ((-1) ** j)
-                    pos[(2 + i) % 3] = (-k) * ((-1) ** j)
-
-                    #position of the nearest hexagon already defined
-                    pos_ser = (
-                        pos[0] + x_list[j+i*2],
-                        pos[1] + y_list[j+i*2], 
-                        pos[2] + z_list[j+i*2])
-                    
-                    #position to search in df_nei
-                    pos_ser_n = (
-                        x_list[j+i*2] * (-1),
-                        y_list[j+i*2] * (-1),
-                        z_list[j+i*2] * (-1))
-
-                    select_data = df_pos['pos'] == pos_ser
-
-                    if pitch_class_display == False:
-                        current_sup = df_pos[select_data].iat[0, 2]
-
-                    #get df for the note of reference from df_nei
-                    df_nei_gr = df_nei.groupby('ref').get_group(df_pos[select_data].iat[0, 1])
-
-                    #select the name of the note from the hexagone
-                    select_data = df_nei_gr['pos'] == pos_ser_n
-
-                    #register the hex in function of the type of value
-                    if pitch_class_display:
-                        current_note = df_nei_gr[select_data].iat[0, 2]
-                        df_pos = df_pos.append(
-                            {'pos':(pos[0], pos[1], pos[2]),
-                                'note':current_note},
-                            ignore_index=True)
-                    else:
-                        current_note = df_nei_gr[select_data].iat[0, 2]
-                        current_sup = current_sup + df_nei_gr[select_data].iat[0, 3]
-                        df_pos = df_pos.append(
-                            {'pos':(pos[0], pos[1], pos[2]),
-                                'note':current_note,
-                                'acc':current_sup},
-                            ignore_index=True)
-                        
-                    #set the facecolor of the hex
-                    color = cmap(0)
-                    color_nb = 0
-                    found = False
-                    for l in range(df_data.shape[0]):
-                        if pitch_class_display:
-                            #check if he finds the note in the data and get its value for color
-                            if str(int(df_data.at[l, 'pc'])) == str(current_note):
-                                if duration:
-                                    color = cmap(norm(df_data.at[l, 'duration']))
-                                    color_nb = norm(df_data.at[l, 'duration'])
-                                else:
-                                    color = cmap(norm(df_data.at[l, 'nb']))
-                                    color_nb = norm(df_data.at[l, 'nb'])
-                                found = True
-                        else:
-                            if df_data.at[l, 'step'] == current_note and df_data.at[l, 'acc'] == current_sup:
-                                if duration:
-                                    color = cmap(norm(df_data.at[l, 'duration']))
-                                    color_nb = norm(df_data.at[l, 'duration'])
-                                else:
-                                    color = cmap(norm(df_data.at[l, 'nb']))
-                                    color_nb = norm(df_data.at[l, 'nb'])
-                                found = True
-                                
-                    if found == False and pd.isnull(nan_color) == False:
-                        color = nan_color
-
-                    #define the color af the label in function of the color of the hexagon
-                    if color_nb > 0.6:
-                        color_text = 'White'
-                    else:
-                        color_text = 'Black'
-
-                    if pitch_class_display == False:
-                        current_note = put_flat_sharp(current_note, current_sup)
-
-                    #calcul the center position of the hex in function of the coordonnate
-                    center_pos = [0.5 + pos[0] * HEXEDGE * length - pos[1] * HEXEDGE * length,
-                              0.5 + pos[0] * length / 2 + pos[1] * length / 2 - pos[2] * length]
-
-                    show_hex = True
-
-                    #if no duplicate then check if the note is already display
-                    if duplicate == False:
-                        for l in range(df_pos.shape[0] - 1):
-                            if pitch_class_display:
-                                if df_pos.at[l, 'note'] == df_pos.at[df_pos.shape[0] - 1, 'note']:
-                                    show_hex = False
-                            else:
-                                if df_pos.at[l, 'note'] == df_pos.at[df_pos.shape[0] - 1, 'note'] and\
-                                   df_pos.at[l, 'acc'] == df_pos.at[df_pos.shape[0] - 1, 'acc']:
-                                    show_hex = False
-
-                    #draw
-                    if show_hex:
-                        if not edgecolor:
-                            edgecolor = color
-                        p = patches.RegularPolygon(
-                            center_pos,
-                            6,
-                            radius=length,
-                            facecolor=color,
-                            edgecolor=edgecolor,
-                            **kwargs)
-                        if pitch_class_display:
-                            ax.text(
-                                center_pos[0],
-                                center_pos[1],
-                                str(int(current_note)),
-                                color=color_text,
-                                horizontalalignment='center',
-                                verticalalignment='center',
-                                size=size_text)
-                        else:
-                            ax.text(
-                                center_pos[0],
-                                center_pos[1],
-                                current_note.replace('#', r'$\sharp$') \
-                                            .replace('b', r'$\flat$'),
-                                color=color_text,
-                                horizontalalignment='center',
-                                verticalalignment='center',
-                                size=size_text)
-                        ax.add_patch(p)
-    
-    #display a colorbar if asked
-    if colorbar:
-        ax2 = fig.add_subplot(1, 10, 1)
-        cb1 = matplotlib.colorbar.ColorbarBase(ax2, cmap=cmap,
-                                        norm=norm,
-                                        orientation='vertical')
-
-    #display off the axis
-    ax.axis('off')
-    
-    return fig
+            first_hex = 0 if not pd.isnull(self.center) or len(values) == 1 else 1
+            edge_colors = np.tile(face_colors[first_hex], (len(values), 1))
+        if pd.isnull(self.center):
+            edge_colors[0] = face_colors[0]
+        return (norm, face_colors, edge_colors, label_colors)
@@ -0,0 +1,191 @@
+"""
+Render the animation of a chart over a piece, the frames are sent to ffmpeg as they are drawn
+"""
+import os
+import time
+import shutil
+import tempfile
+import subprocess
+
+import numpy as np
+
+from pitchplots.audio import write_soundtrack
+from pitchplots.reader import get_df_long, get_frame_index
+from pitchplots.static import TonnetzRenderer, CircleRenderer, LineRenderer
+from pitchplots.profiling import stage
+
+#the renderer of each type of chart
+RENDERERS = {'tonnetz': TonnetzRenderer, 'circle': CircleRenderer, 'line': LineRenderer}
+
+class VideoError(Exception):
+    """Exception thrown when ffmpeg cannot be found or fails to encode the video."""
+    pass
+
+def get_ffmpeg():
+    """return the path of ffmpeg, the one of the PATH or else the one installed with moviepy (imageio-ffmpeg)"""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is not None:
+        return ffmpeg
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        raise VideoError('ffmpeg was not found, install it or give its path')
+
+class FrameEncoder(object):
+    """Context manager that sends RGB frames to an ffmpeg process that encodes them in a video file.
+
+    The frames are written in the pipe of ffmpeg as they come, so the memory used does not depend
+    on the length of the video. If audio is given it is muxed with the frames in the same run.
+
+    Keyword arguments:
+    filepath -- the video file, its format is given by its extension (e.g. .mp4)
+    width, height -- the size of the frames in pixels
+    fps -- the number of frames by second
+    audio -- the path of a sound file to put in the video, None for a silent video
+    codec -- the video codec of ffmpeg
+    ffmpeg -- the path of ffmpeg, by default see get_ffmpeg
+    """
+
+    def __init__(self, filepath, width, height, fps, audio=None, codec='libx264', ffmpeg=None):
+        self.filepath = filepath
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.audio = audio
+        self.codec = codec
+        self.ffmpeg = get_ffmpeg() if ffmpeg is None else ffmpeg
+        self.nb_frames = 0
+        self._process = None
+        self._stderr = None
+
+    def __enter__(self):
+        command = [self.ffmpeg, '-y', '-loglevel', 'error',
+                   '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', '%dx%d' % (self.width, self.height),
+                   '-r', str(self.fps), '-i', '-']
+        if self.audio is not None:
+            command += ['-i', self.audio]
+        #yuv420p needs an even width and height
+        command += ['-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-c:v', self.codec, '-pix_fmt', 'yuv420p']
+        if self.audio is not None:
+            command += ['-c:a', 'aac', '-shortest']
+        command.append(self.filepath)
+        #the messages of ffmpeg go to a file, a pipe that is not read while the frames are sent could fill and block
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=self._stderr)
+        return self
+
+    def write(self, frame):
+        """send a frame, an uint8 array of shape (height, width, 3)"""
+        try:
+            self._process.stdin.write(memoryview(frame))
+        except BrokenPipeError:
+            self._raise_error()
+        self.nb_frames += 1
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                #ffmpeg stopped, its return code and its messages tell why
+                pass
+            if exc_type is not None:
+                self._process.kill()
+                self._process.wait()
+                return False
+            if self._process.wait() != 0:
+                self._raise_error()
+        finally:
+            self._stderr.close()
+        return False
+
+    def _raise_error(self):
+        """raise a VideoError with the message of ffmpeg"""
+        self._process.wait()
+        self._stderr.seek(0)
+        raise VideoError('ffmpeg failed: ' + self._stderr.read().decode(errors='replace').strip())
+
+def render_animation(
+    piece,
+    filepath,
+    chart='tonnetz',
+    cumulative=True,
+    pitch_type='tpc',
+    measures=None,
+    duration=False,
+    sampling_frequency=25,
+    speed_ratio=1,
+    audio=True,
+    codec='libx264',
+    ffmpeg=None,
+    **kwargs):
+    """render the animation of a chart over a piece in a video file, return (number of frames, frames by second)
+
+    The chart is built once for the whole piece, each frame only changes its colors (or its bars) with
+    the notes played until then, or at that moment, it is drawn by the Agg canvas of the figure in one
+    RGB buffer used for all the frames and sent to ffmpeg. The soundtrack is mixed from the same notes.
+    Keyword arguments:
+    piece -- the absolute path to the .csv (or .mxl/.xml) file containing the data, a DataFrame or (store, piece_id)
+    filepath -- the video file, e.g. 'piece.mp4'
+    chart -- the type of chart, 'tonnetz', 'circle' or 'line'
+    cumulative -- if True a frame shows all the notes played since the start, if False only the notes playing
+    pitch_type -- the type of data that contains the file (default 'tpc')
+    measures -- give a set of measures example [5, 18], will display the notes of the measures 5 to 18 included
+    duration -- if True the notes are counted with their duration, if False by their number of appearance
+    sampling_frequency -- the number of frames by second of the video
+    speed_ratio -- set the speed at which the video is read, for example : 2 accelerate the speed of the video by 2
+    audio -- if True the soundtrack of the notes is put in the video
+    codec -- the video codec of ffmpeg
+    ffmpeg -- the path of ffmpeg, by default see get_ffmpeg
+    **kwargs -- these arguments are redirected to the chart (TonnetzRenderer, CircleRenderer or LineRenderer)
+    return:
+    nb_frames -- the number of frames of the video
+    frames_per_second -- the number of frames rendered and encoded by second
+    """
+    if chart not in RENDERERS:
+        raise VideoError('The type of chart must be one of %s, not %r' % (sorted(RENDERERS), chart))
+    if kwargs.get('pitch_class_display'):
+        pitch_type = 'pc'
+    df_data = get_df_long(piece, pitch_type=pitch_type, measures=measures, sampling_frequency=sampling_frequency,
+                          speed_ratio=speed_ratio, frames=True)
+    df_data.sort_values('frame', kind='stable', inplace=True)
+    first_row, last_row = get_frame_index(df_data)
+
+    #the notes are replaced by their codes so the values of a frame are counted with bincount
+    codes, notes = (df_data['pc'].astype(int) if pitch_type == 'pc' else df_data['tpc']).factorize()
+    frame_end = df_data['frame_end'].values
+    weights = df_data['duration'].values if duration else np.ones(codes.shape[0])
+
+    renderer = RENDERERS[chart](df_data, pitch_type=pitch_type, measures=None, duration=duration, **kwargs)
+    canvas = renderer.fig.canvas
+    width, height = canvas.get_width_height()
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        audio_path = None
+        if audio:
+            with stage('video.soundtrack'):
+                audio_path = os.path.join(tmp_dir, 'soundtrack.wav')
+                duration_seconds = df_data['duration']*4*60/df_data['qpm']/speed_ratio
+                write_soundtrack(df_data['pitch'], df_data['onset_seconds'], duration_seconds, audio_path)
+
+        with FrameEncoder(filepath, width, height, sampling_frequency, audio_path, codec, ffmpeg) as encoder:
+            values = np.zeros(notes.shape[0])
+            for f in range(first_row.shape[0]):
+                with stage('video.frame'):
+                    if cumulative:
+                        rows = slice(last_row[f - 1] if f > 0 else 0, last_row[f])
+                        values += np.bincount(codes[rows], weights[rows], minlength=notes.shape[0])
+                    else:
+                        rows = np.arange(first_row[f], last_row[f])
+                        rows = rows[frame_end[rows] > f]
+                        values = np.bincount(codes[rows], weights[rows], minlength=notes.shape[0])
+                    played = values > 0
+                    renderer.update(dict(zip(notes[played], values[played])))
+                    canvas.draw()
+                    np.copyto(frame, np.asarray(canvas.buffer_rgba())[:, :, :3])
+                    encoder.write(frame)
+    seconds = time.perf_counter() - start
+    return (encoder.nb_frames, encoder.nb_frames/seconds if seconds > 0 else 0)